@@ -0,0 +1,35 @@
+"""Benchmarks of Open Lobby App. Run them from repository root as modules,
+e.g.: python -m benchmarks.dates
+"""
+
+import math
+import os
+import timeit
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "olapp.settings")
+    os.environ.setdefault("SECRET_KEY", "justForBenchmarks")
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    # pages link static files by their hashed names
+    call_command("collectstatic", interactive=False, verbosity=0)
+
+
+def measure(func, *, number=None, repeat=5):
+    """Returns best time of one func call in seconds."""
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def percentile(values, percent):
+    """Returns percentile of values by nearest rank method."""
+    values = sorted(values)
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
@@ -0,0 +1,210 @@
+"""In-process fake of Open Lobby Server GraphQL API. It answers queries of
+Open Lobby App by operation name with generated data of configurable size and
+latency, e.g.:
+
+    backend = FakeBackend(latency=0.02, total_reports=5000)
+    backend.start()
+    ...
+    backend.stop()
+"""
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import json
+import threading
+import time
+
+
+def global_id(type, id):
+    return base64.b64encode(f"{type}:{id}".encode("utf-8")).decode("utf-8")
+
+
+def decode_id(id):
+    return base64.b64decode(id).decode("utf-8").split(":")[1]
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are sent separately, don't wait for delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        content = self.rfile.read(int(self.headers["Content-Length"]))
+        payload = json.loads(content)
+        logged_in = "Authorization" in self.headers
+
+        if self.server.backend.latency:
+            time.sleep(self.server.backend.latency)
+
+        if isinstance(payload, list):
+            response = [self.server.backend.respond(p, logged_in) for p in payload]
+        else:
+            response = self.server.backend.respond(payload, logged_in)
+
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBackend:
+    """Fake GraphQL API. Latency is in seconds, body_size is length of report
+    body in characters. Counts of answered operations are in operations.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency=0.0,
+        total_reports=1000,
+        total_authors=100,
+        body_size=1000,
+        revisions=3,
+    ):
+        self.latency = latency
+        self.total_reports = total_reports
+        self.total_authors = total_authors
+        self.body_size = body_size
+        self.revisions = revisions
+        self.operations = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/graphql"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBackendHandler)
+        self._server.daemon_threads = True
+        self._server.backend = self
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, payload, logged_in):
+        name = payload.get("operationName")
+        variables = payload.get("variables") or {}
+        with self._lock:
+            self.operations[name] += 1
+
+        method = getattr(self, f"respond_{name}", None)
+        if method is None:
+            return {"errors": [{"message": f"Unknown operation {name}."}]}
+        data = method(variables)
+
+        if variables.get("withViewer"):
+            data["viewer"] = self.viewer() if logged_in else None
+        return {"data": data}
+
+    # data
+
+    def viewer(self):
+        return dict(
+            self.author(1), email="jan@example.com", openidUid="jan", isAuthor=True
+        )
+
+    def author(self, num):
+        return {
+            "id": global_id("Author", num),
+            "firstName": "Jan",
+            "lastName": f"Novák {num}",
+            "hasCollidingName": num % 10 == 0,
+            "extra": None,
+        }
+
+    def report(self, num, *, author=True):
+        day = num % 28 + 1
+        words = "Lobbista navrhoval změnu paragrafu zákona o veřejných zakázkách. "
+        body = (words * (self.body_size // len(words) + 1))[: self.body_size]
+        report = {
+            "id": global_id("Report", num),
+            "date": f"2018-02-{day:02d}T12:00:00+00:00",
+            "published": f"2018-03-{day:02d}T10:15:30.123456+00:00",
+            "edited": f"2018-04-{day:02d}T08:00:00+00:00",
+            "title": f"Schůzka číslo {num}",
+            "body": body,
+            "receivedBenefit": "oběd" if num % 2 else "",
+            "providedBenefit": "",
+            "ourParticipants": "Jan Novák",
+            "otherParticipants": "Petr Dvořák, Svaz průmyslu",
+            "extra": None,
+            "hasRevisions": self.revisions > 0,
+        }
+        if author:
+            report["author"] = self.author(num % self.total_authors + 1)
+        return report
+
+    def edges(self, make_node, total, variables):
+        first = variables.get("first") or 10
+        offset = 0
+        if variables.get("after"):
+            offset = int(base64.b64decode(variables["after"]))
+        end = min(offset + first, total)
+        return {
+            "totalCount": total,
+            "edges": [{"node": make_node(num)} for num in range(offset + 1, end + 1)],
+        }
+
+    # operations
+
+    def respond_viewer(self, variables):
+        return {}
+
+    def respond_searchReports(self, variables):
+        return {"searchReports": self.edges(self.report, self.total_reports, variables)}
+
+    def respond_report(self, variables):
+        num = int(decode_id(variables["id"]))
+        report = dict(self.report(num), isDraft=False)
+        if variables.get("withRevisions"):
+            report["revisions"] = [
+                self.report(num, author=False) for i in range(self.revisions)
+            ]
+        return {"node": report}
+
+    def respond_authorWithReports(self, variables):
+        num = int(decode_id(variables["id"]))
+        reports = self.edges(
+            lambda i: self.report(i, author=False), self.total_reports, variables
+        )
+        return {"node": dict(self.author(num), reports=reports)}
+
+    def respond_authors(self, variables):
+        def author(num):
+            return dict(self.author(num), totalReports=num)
+
+        return {"authors": self.edges(author, self.total_authors, variables)}
+
+    def respond_loginShortcuts(self, variables):
+        return {
+            "loginShortcuts": [
+                {"id": global_id("LoginShortcut", num), "name": f"Zkratka {num}"}
+                for num in range(1, 4)
+            ]
+        }
+
+    def respond_reportDrafts(self, variables):
+        return {
+            "reportDrafts": [
+                {
+                    "id": global_id("Report", num),
+                    "date": "2018-02-01T12:00:00+00:00",
+                    "title": f"Koncept {num}",
+                    "body": "Rozepsaný report.",
+                }
+                for num in range(1, 4)
+            ]
+        }
+
+    def respond_loginByShortcut(self, variables):
+        return {"loginByShortcut": {"authorizationUrl": "http://localhost/openid"}}
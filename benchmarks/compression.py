@@ -0,0 +1,77 @@
+"""CPU time vs. size of compressed HTML pages rendered from real templates
+(against in-process fake of Open Lobby Server, see benchmarks.backend).
+
+Run e.g.: python -m benchmarks.compression --body-size 2000
+"""
+
+import argparse
+import brotli
+import os
+import zlib
+
+from benchmarks import measure, setup_django
+from benchmarks.backend import FakeBackend
+
+
+PAGES = [
+    ("index", "/"),
+    ("authors", "/authors/"),
+    ("author", "/author/1/"),
+    ("report", "/report/1/"),
+]
+
+BROTLI_QUALITIES = [1, 4, 6, 11]
+GZIP_LEVELS = [1, 6, 9]
+
+
+def compress_gzip(content, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_brotli(content, quality):
+    return brotli.compress(content, mode=brotli.MODE_TEXT, quality=quality)
+
+
+def get_compressors():
+    for quality in BROTLI_QUALITIES:
+        yield f"br {quality}", lambda c, q=quality: compress_brotli(c, q)
+    for level in GZIP_LEVELS:
+        yield f"gzip {level}", lambda c, l=level: compress_gzip(c, l)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--body-size", type=int, default=1000, help="in characters")
+    args = parser.parse_args()
+
+    for name in ["QUERY_CACHE_SIZE", "FRAGMENT_CACHE_SIZE", "STALE_CACHE_SIZE"]:
+        os.environ[name] = "0"
+    backend = FakeBackend(body_size=args.body_size)
+    backend.start()
+    setup_django()
+
+    from django.conf import settings
+    from django.test import Client
+
+    settings.OPENLOBBY_API_URL = backend.url
+    client = Client()
+
+    print(f"{'page':>8} {'encoding':>8} {'bytes':>8} {'ratio':>6} {'time':>10}")
+    for page, path in PAGES:
+        # without Accept-Encoding response isn't compressed
+        content = client.get(path).content
+        print(f"{page:>8} {'-':>8} {len(content):>8}")
+        for encoding, func in get_compressors():
+            size = len(func(content))
+            seconds = measure(lambda: func(content))
+            print(
+                f"{'':>8} {encoding:>8} {size:>8} {len(content) / size:>6.1f} "
+                f"{seconds * 1e6:>8.0f}us"
+            )
+
+    backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Decoding of report date times: arrow per field vs. batch decoder."""
+
+import arrow
+import base64
+import copy
+import json
+
+from benchmarks import measure, setup_django
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+
+from olapp.core.graphql import pythonize_report_edges  # noqa: E402
+
+
+def make_edges(count):
+    edges = []
+    for i in range(count):
+        day = i % 28 + 1
+        published = f"2018-03-{day:02d}T{i % 24:02d}:15:30.123456+00:00"
+        edited = published if i % 3 else f"2018-04-{day:02d}T08:00:00+00:00"
+        report = {
+            "id": base64.b64encode(f"Report:{i}".encode()).decode(),
+            "date": f"2018-02-{day:02d}T12:00:00+00:00",
+            "published": published,
+            "edited": edited,
+            "extra": None,
+        }
+        edges.append({"node": report})
+    return edges
+
+
+def arrow_pythonize_report(report):
+    """Former implementation with arrow."""
+    report["id"] = base64.b64decode(report["id"]).decode("utf-8").split(":")[1]
+    if report["extra"] is not None:
+        report["extra"] = json.loads(report["extra"])
+    report["date"] = arrow.get(report["date"]).to(settings.TIME_ZONE).date()
+    report["published"] = arrow.get(report["published"]).to(settings.TIME_ZONE).datetime
+    report["edited"] = arrow.get(report["edited"]).to(settings.TIME_ZONE).datetime
+    return report
+
+
+def arrow_pythonize_report_edges(edges):
+    for edge in edges:
+        edge["node"] = arrow_pythonize_report(edge["node"])
+    return edges
+
+
+def decode_edges(edges):
+    """Pythonizes edges and reads all fields, reports decode them lazily."""
+    for edge in pythonize_report_edges(edges):
+        report = edge["node"]
+        report["id"], report["extra"], report["date"]
+        report["published"], report["edited"]
+    return edges
+
+
+def main():
+    print(f"{'edges':>6} {'arrow':>12} {'batch':>12} {'speedup':>8}")
+    for count in [10, 50, 500]:
+        edges = make_edges(count)
+        arrow_time = measure(lambda: arrow_pythonize_report_edges(copy.deepcopy(edges)))
+        batch_time = measure(lambda: decode_edges(copy.deepcopy(edges)))
+        copy_time = measure(lambda: copy.deepcopy(edges))
+        arrow_time -= copy_time
+        batch_time -= copy_time
+        print(
+            f"{count:>6} {arrow_time * 1e6:>10.0f}us {batch_time * 1e6:>10.0f}us "
+            f"{arrow_time / batch_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
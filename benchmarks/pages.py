@@ -0,0 +1,193 @@
+"""Requests/s and latency percentiles of every page. Pages are requested
+sequentially from WSGI handler (Django test client) or ASGI application,
+against in-process fake of Open Lobby Server (see benchmarks.backend) or
+recorded traffic of Open Lobby Server (see benchmarks.replay).
+
+Run e.g.: python -m benchmarks.pages --requests 200 --latency 5
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import time
+
+from benchmarks import percentile
+from benchmarks.backend import FakeBackend
+from benchmarks.replay import ReplayBackend, load_records
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100, help="per page")
+    parser.add_argument("--warmup", type=int, default=5, help="requests per page")
+    parser.add_argument("--latency", type=float, default=0, help="of backend in ms")
+    parser.add_argument("--total-reports", type=int, default=1000)
+    parser.add_argument("--total-authors", type=int, default=100)
+    parser.add_argument("--body-size", type=int, default=1000, help="in characters")
+    parser.add_argument(
+        "--cache", action="store_true", help="enable query and fragment caches"
+    )
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="drive ASGI application (asynchronous views) instead of WSGI",
+    )
+    parser.add_argument("--only", help="regular expression of page names")
+    parser.add_argument(
+        "--replay",
+        action="append",
+        metavar="FILE",
+        help="serve recorded traffic of Open Lobby Server instead of fake data",
+    )
+    return parser.parse_args()
+
+
+def configure(args):
+    """Sets environment, it must be done before Django setup."""
+    if not args.cache:
+        for name in ["QUERY_CACHE_SIZE", "FRAGMENT_CACHE_SIZE", "STALE_CACHE_SIZE"]:
+            os.environ[name] = "0"
+    if args.asgi:
+        os.environ["ASYNC_VIEWS"] = "1"
+
+
+def make_token():
+    import jwt
+
+    payload = {"sub": "jan", "exp": int(time.time()) + 24 * 60 * 60}
+    return jwt.encode(payload, "justForBenchmarks").decode("utf-8")
+
+
+def get_pages(token, total_authors):
+    """Returns (name, path, logged in, expected status code) of every URL.
+    Viewer is the first author, author of every total_authors-th report.
+    """
+    return [
+        ("index", "/", False, 200),
+        ("index search", "/?q=lobbista&s=relevance", False, 200),
+        ("index page 50", "/?p=50", False, 200),
+        ("authors", "/authors/", False, 200),
+        ("author", "/author/1/", False, 200),
+        ("author page 2", "/author/1/2/", False, 200),
+        ("report", "/report/1/", False, 200),
+        ("report history", "/report/1/history/", False, 200),
+        ("login", "/login/", False, 200),
+        ("login by shortcut", "/login/1/", False, 302),
+        ("login redirect", f"/login-redirect/?token={token}", False, 302),
+        ("about", "/about/", False, 200),
+        ("account", "/account/", True, 200),
+        ("new report", "/new-report/", True, 200),
+        ("edit report", f"/report/{total_authors}/edit/", True, 200),
+        ("index logged in", "/", True, 200),
+        ("logout", "/logout/", True, 302),
+    ]
+
+
+class WsgiClient:
+    """Django test client, it calls WSGI handler directly."""
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client()
+
+    def get(self, path):
+        return self.client.get(path)
+
+    def set_cookie(self, name, value):
+        self.client.cookies[name] = value
+
+
+class AsgiClient:
+    """Calls ASGI application in one event loop, like ASGI server does."""
+
+    def __init__(self):
+        import httpx
+        from olapp.asgi import application
+
+        self.loop = asyncio.new_event_loop()
+        transport = httpx.ASGITransport(app=application)
+        self.client = httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        )
+
+    def get(self, path):
+        return self.loop.run_until_complete(self.client.get(path))
+
+    def set_cookie(self, name, value):
+        self.client.cookies.set(name, value)
+
+
+def run_page(client, path, status_code, number):
+    """Returns latencies of requests in seconds. Status code None accepts any
+    status except server errors (replayed data decide about them).
+    """
+    latencies = []
+    for i in range(number):
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - start)
+        if status_code is None:
+            if response.status_code >= 500:
+                raise RuntimeError(f"{path} returned {response.status_code}.")
+        elif response.status_code != status_code:
+            raise RuntimeError(f"{path} returned {response.status_code}.")
+    return latencies
+
+
+def main():
+    args = parse_args()
+    configure(args)
+
+    if args.replay:
+        backend = ReplayBackend(load_records(args.replay), latency=args.latency / 1000)
+    else:
+        backend = FakeBackend(
+            latency=args.latency / 1000,
+            total_reports=args.total_reports,
+            total_authors=args.total_authors,
+            body_size=args.body_size,
+        )
+    backend.start()
+
+    from benchmarks import setup_django
+
+    setup_django()
+
+    from django.conf import settings
+
+    settings.OPENLOBBY_API_URL = backend.url
+
+    client_class = AsgiClient if args.asgi else WsgiClient
+    token = make_token()
+    anonymous = client_class()
+    logged_in = client_class()
+    logged_in.set_cookie(settings.ACCESS_TOKEN_COOKIE, token)
+
+    print(f"{'page':>18} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'calls':>6}")
+    for name, path, is_logged_in, status_code in get_pages(token, args.total_authors):
+        if args.only and not re.search(args.only, name):
+            continue
+        client = logged_in if is_logged_in else anonymous
+        if args.replay:
+            status_code = None
+        run_page(client, path, status_code, args.warmup)
+        backend.operations.clear()
+        latencies = run_page(client, path, status_code, args.requests)
+        calls = sum(backend.operations.values()) / args.requests
+        rps = len(latencies) / sum(latencies)
+        p50, p95, p99 = (percentile(latencies, p) * 1000 for p in (50, 95, 99))
+        print(
+            f"{name:>18} {rps:>8.0f} {p50:>6.2f}ms {p95:>6.2f}ms {p99:>6.2f}ms "
+            f"{calls:>6.1f}"
+        )
+        if name == "logout":
+            # logout deletes cookie, log in again for next pages
+            logged_in.set_cookie(settings.ACCESS_TOKEN_COOKIE, token)
+
+    backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Replay of traffic to Open Lobby Server recorded by Open Lobby App (see
+setting OPENLOBBY_API_RECORD). Recorded responses are served back by operation
+name and variables, so production mix of pages can be benchmarked offline.
+Requests which weren't recorded get recorded responses of the same operation
+(and the same authorization) in turns.
+
+Serve recording on port 8010 of localhost for application under load test
+(records contain data of logged in viewers, don't expose them):
+
+    python -m benchmarks.replay records.jsonl.gz --port 8010
+
+or benchmark pages against it: python -m benchmarks.pages --replay records.jsonl.gz
+"""
+
+from collections import defaultdict
+from http.server import ThreadingHTTPServer
+import argparse
+import itertools
+import json
+
+from benchmarks.backend import FakeBackend, FakeBackendHandler
+
+
+def make_key(name, variables, authorized):
+    return name, json.dumps(variables or {}, sort_keys=True), authorized
+
+
+class ReplayBackend(FakeBackend):
+    """GraphQL API serving recorded responses."""
+
+    def __init__(self, records, *, latency=0.0):
+        super().__init__(latency=latency)
+        self.responses = {}
+        # anonymous requests never get responses of logged in viewers
+        by_operation = defaultdict(list)
+        for record in records:
+            name = record["operationName"]
+            authorized = record["authorized"]
+            key = make_key(name, record["variables"], authorized)
+            self.responses[key] = record["response"]
+            by_operation[name, authorized].append(record["response"])
+        self._turns = {key: itertools.cycle(r) for key, r in by_operation.items()}
+        self.misses = 0
+
+    def respond(self, payload, logged_in):
+        name = payload.get("operationName")
+        key = make_key(name, payload.get("variables"), logged_in)
+        with self._lock:
+            self.operations[name] += 1
+            response = self.responses.get(key)
+            turns = self._turns.get((name, logged_in))
+            if response is None and turns is not None:
+                self.misses += 1
+                response = next(turns)
+        if response is None:
+            return {"errors": [{"message": f"Operation {name} wasn't recorded."}]}
+        return response
+
+
+def load_records(paths):
+    from benchmarks import setup_django
+
+    setup_django()
+
+    from olapp.core.recording import read_records
+
+    return [record for path in paths for record in read_records(path)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("records", nargs="+", help="recorded files")
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address to listen on, records contain viewers' data (default: %(default)s)",
+    )
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency", type=float, default=0, help="in ms")
+    args = parser.parse_args()
+
+    backend = ReplayBackend(load_records(args.records), latency=args.latency / 1000)
+    server = ThreadingHTTPServer((args.host, args.port), FakeBackendHandler)
+    server.daemon_threads = True
+    server.backend = backend
+    print(
+        f"Serving {len(backend.responses)} recorded responses "
+        f"on {args.host}:{args.port}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    print(f"Answered {sum(backend.operations.values())}, not recorded {backend.misses}")
+
+
+if __name__ == "__main__":
+    main()
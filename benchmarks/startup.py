@@ -0,0 +1,86 @@
+"""Cold start of olapp.wsgi: time of import (with and without WARMUP) and
+latencies of the first and the second request, in fresh processes against
+in-process fake of Open Lobby Server (see benchmarks.backend).
+
+Run e.g.: python -m benchmarks.startup --runs 10 --latency 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import setup_django
+from benchmarks.backend import FakeBackend
+
+
+# runs in fresh process, prints timings as JSON
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+import olapp.wsgi
+loaded = time.perf_counter()
+from django.test import Client
+client = Client()
+timings = {"import": loaded - start}
+for name in ["first", "second"]:
+    start = time.perf_counter()
+    response = client.get(sys.argv[1])
+    timings[name] = time.perf_counter() - start
+    assert response.status_code == 200, response.status_code
+print(json.dumps(timings))
+"""
+
+
+def run_worker(path, env):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER, path],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+    ).stdout
+    timings = json.loads(output)
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0, help="of backend in ms")
+    parser.add_argument("--path", default="/", help="requested page")
+    args = parser.parse_args()
+
+    # pages link static files by their hashed names
+    setup_django()
+
+    backend = FakeBackend(latency=args.latency / 1000)
+    backend.start()
+
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "justForBenchmarks")
+    env["OPENLOBBY_SERVER_DSN"] = backend.url[: -len("/graphql")]
+    env.pop("WARMUP", None)
+
+    phases = ["process", "import", "first", "second"]
+    print(f"{'mode':>8} " + " ".join(f"{phase:>10}" for phase in phases))
+    for mode in ["cold", "warmup"]:
+        if mode == "warmup":
+            env["WARMUP"] = "1"
+        results = [run_worker(args.path, env) for i in range(args.runs)]
+        values = [median([r[phase] for r in results]) * 1000 for phase in phases]
+        print(f"{mode:>8} " + " ".join(f"{value:>8.1f}ms" for value in values))
+
+    backend.stop()
+
+
+if __name__ == "__main__":
+    main()
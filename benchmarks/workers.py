@@ -0,0 +1,131 @@
+"""Throughput and latency of gunicorn worker classes (sync, gthread, gevent)
+under latency of Open Lobby Server. Gunicorn is started with gunicorn.conf.py
+against in-process fake of the server (see benchmarks.backend) and loaded by
+concurrent clients. Caches are disabled, every request waits for the server.
+
+Run e.g.: python -m benchmarks.workers --latency 50 --concurrency 32
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks import percentile, setup_django
+from benchmarks.backend import FakeBackend
+
+
+WORKER_CLASSES = ["sync", "gthread", "gevent"]
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            get(port, "/about/")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Gunicorn didn't start.")
+
+
+def load(port, path, concurrency, duration):
+    """Returns latencies of requests in seconds."""
+    deadline = time.monotonic() + duration
+
+    def client():
+        latencies = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            status = get(port, path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"{path} returned {status}.")
+        return latencies
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        futures = [executor.submit(client) for i in range(concurrency)]
+        return [latency for future in futures for latency in future.result()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=50, help="of backend in ms")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="of gthread worker")
+    parser.add_argument("--concurrency", type=int, default=32, help="clients")
+    parser.add_argument("--duration", type=float, default=5, help="in seconds")
+    parser.add_argument("--path", default="/", help="requested page")
+    parser.add_argument(
+        "--worker-class", action="append", choices=WORKER_CLASSES, dest="classes"
+    )
+    args = parser.parse_args()
+
+    # pages link static files by their hashed names
+    setup_django()
+
+    backend = FakeBackend(latency=args.latency / 1000)
+    backend.start()
+
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "justForBenchmarks")
+    env.update(
+        OPENLOBBY_SERVER_DSN=backend.url[: -len("/graphql")],
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        OPENLOBBY_API_POOL_SIZE=str(max(args.threads, 10)),
+        QUERY_CACHE_SIZE="0",
+        FRAGMENT_CACHE_SIZE="0",
+        STALE_CACHE_SIZE="0",
+        WARMUP="1",
+    )
+
+    print(f"{'worker':>8} {'rps':>8} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for worker_class in args.classes or WORKER_CLASSES:
+        port = get_free_port()
+        env["GUNICORN_WORKER_CLASS"] = worker_class
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}"]
+            + ["--access-logfile", os.devnull, "olapp.wsgi"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_server(port)
+            latencies = load(port, args.path, args.concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait()
+        rps = len(latencies) / args.duration
+        p50, p95, p99 = (percentile(latencies, p) * 1000 for p in (50, 95, 99))
+        print(
+            f"{worker_class:>8} {rps:>8.0f} {p50:>8.1f}ms {p95:>8.1f}ms {p99:>8.1f}ms"
+        )
+
+    backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Configuration of gunicorn, it's read from current directory. Options
+given on command line override it. See
+https://docs.gunicorn.org/en/stable/settings.html
+
+Worker class is chosen by GUNICORN_WORKER_CLASS environment variable:
+ - sync - one request per worker process at a time
+ - gthread (default) - GUNICORN_THREADS requests per worker process
+ - gevent - up to GUNICORN_WORKER_CONNECTIONS requests per worker process
+"""
+
+import os
+
+bind = "0.0.0.0:8020"
+workers = int(os.environ.get("GUNICORN_WORKERS", 4))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# gunicorn would switch sync worker with more threads to gthread
+threads = int(os.environ.get("GUNICORN_THREADS", 8)) if worker_class == "gthread" else 1
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 100))
+
+# application is loaded (and warmed up, see WARMUP setting) once in master
+# process, workers forked from it start ready and share its memory, code
+# changes need restart instead of reload (HUP)
+preload_app = True
+
+if worker_class == "gevent":
+    # patch before application is preloaded, otherwise its locks, threads and
+    # sockets would block whole worker
+    from gevent import monkey
+
+    monkey.patch_all()
+
+accesslog = "-"
+errorlog = "-"
+capture_output = True
+
+
+def worker_exit(server, worker):
+    """Writes records buffered by worker (see OPENLOBBY_API_RECORD setting)."""
+    from olapp.core.recording import recorder
+
+    if recorder is not None:
+        recorder.close()
@@ -0,0 +1,24 @@
+"""
+ASGI config for olapp project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Application served by ASGI server uses asynchronous views.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "olapp.settings")
+os.environ.setdefault("ASYNC_VIEWS", "1")
+
+application = get_asgi_application()
+
+if settings.WARMUP:
+    from olapp.core.warmup import warm_up
+
+    warm_up()
@@ -0,0 +1,227 @@
+"""Asynchronous variants of views. They call Open Lobby Server with
+asynchronous API client, so they don't block the worker while waiting for
+the server. Used when application runs on ASGI server (see olapp.asgi).
+"""
+
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils.decorators import classonlymethod
+from django.views.generic.edit import FormMixin
+from functools import update_wrapper
+import asyncio
+
+from . import graphql
+from . import mutations
+from . import queries
+from . import views
+from .utils import get_token, token_required, viewer_required
+
+
+class AsyncViewMixin:
+    """Makes class based view asynchronous, its handlers are coroutines."""
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            # handlers like http_method_not_allowed are synchronous
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        update_wrapper(async_view, view)
+        return async_view
+
+
+class AsyncTemplateViewMixin(AsyncViewMixin):
+    async def get(self, request, *args, **kwargs):
+        context = await self.get_context_data(**kwargs)
+        return self.render_to_response(context)
+
+
+class AsyncFormViewMixin(AsyncViewMixin):
+    async def get(self, request, *args, **kwargs):
+        context = await self.get_context_data()
+        return self.render_to_response(context)
+
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        if form.is_valid():
+            return await self.form_valid(form)
+        context = await self.get_context_data(form=form)
+        return self.render_to_response(context)
+
+
+class IndexView(AsyncTemplateViewMixin, views.IndexView):
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.IndexView, self).get_context_data(**kwargs)
+        params = self.get_params()
+        search, viewer = await queries.async_search_reports(
+            settings.OPENLOBBY_API_URL, params, token=token
+        )
+        return self.extend_context(context, search, viewer)
+
+
+class AuthorsView(AsyncTemplateViewMixin, views.AuthorsView):
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.AuthorsView, self).get_context_data(**kwargs)
+        params = self.get_params()
+        authors, viewer = await queries.async_get_authors(
+            settings.OPENLOBBY_API_URL, params, token=token
+        )
+        return self.extend_context(context, authors, viewer)
+
+
+class ReportView(AsyncTemplateViewMixin, views.ReportView):
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.ReportView, self).get_context_data(**kwargs)
+
+        try:
+            report, viewer = await queries.async_get_report(
+                settings.OPENLOBBY_API_URL, kwargs["id"], token=token
+            )
+        except queries.NotFoundError:
+            raise Http404
+
+        return self.extend_context(context, report, viewer)
+
+
+class ReportHistoryView(AsyncTemplateViewMixin, views.ReportHistoryView):
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.ReportHistoryView, self).get_context_data(**kwargs)
+
+        try:
+            report, viewer = await queries.async_get_report(
+                settings.OPENLOBBY_API_URL,
+                kwargs["id"],
+                token=token,
+                with_revisions=True,
+            )
+        except queries.NotFoundError:
+            raise Http404
+
+        context["report"] = report
+        context["viewer"] = viewer
+        return context
+
+
+class AuthorView(AsyncTemplateViewMixin, views.AuthorView):
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.AuthorView, self).get_context_data(**kwargs)
+        params = self.get_params()
+
+        try:
+            author, viewer = await queries.async_get_author_with_reports(
+                settings.OPENLOBBY_API_URL, kwargs["id"], params, token=token
+            )
+        except queries.NotFoundError:
+            raise Http404
+
+        return self.extend_context(context, author, viewer)
+
+
+class LoginView(AsyncFormViewMixin, views.LoginView):
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.LoginView, self).get_context_data(**kwargs)
+        login_shortcuts, viewer = await queries.async_get_login_shortcuts(
+            settings.OPENLOBBY_API_URL, token=token
+        )
+        context["login_shortcuts"] = login_shortcuts
+        context["viewer"] = viewer
+        return context
+
+    async def form_valid(self, form):
+        openid_uid = form.cleaned_data["openid_uid"]
+        redirect_uri = views.get_login_redirect_uri()
+        data = await mutations.async_login(
+            settings.OPENLOBBY_API_URL, openid_uid, redirect_uri
+        )
+        self.authorization_url = data["authorizationUrl"]
+        return FormMixin.form_valid(self, form)
+
+
+class LoginByShortcutView(AsyncViewMixin, views.LoginByShortcutView):
+    async def get(self, request, **kwargs):
+        shortcut_id = graphql.encode_global_id("LoginShortcut", kwargs["shortcut_id"])
+        redirect_uri = views.get_login_redirect_uri()
+        data = await mutations.async_login_by_shortcut(
+            settings.OPENLOBBY_API_URL, shortcut_id, redirect_uri
+        )
+        return redirect(data["authorizationUrl"])
+
+
+class AccountView(AsyncTemplateViewMixin, views.AccountView):
+    @viewer_required
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.AccountView, self).get_context_data(**kwargs)
+        context["viewer"] = await queries.async_get_viewer(
+            settings.OPENLOBBY_API_URL, token=token
+        )
+        return context
+
+
+class NewReportView(AsyncFormViewMixin, views.NewReportView):
+    @token_required
+    async def form_valid(self, form, token):
+        self.id = await mutations.async_create_report(
+            settings.OPENLOBBY_API_URL, form.cleaned_data, token=token
+        )
+        self.is_draft = form.cleaned_data["is_draft"]
+        return FormMixin.form_valid(self, form)
+
+    @viewer_required
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        drafts, viewer = await queries.async_get_report_drafts(
+            settings.OPENLOBBY_API_URL, token=token
+        )
+        self.viewer = viewer
+        context = super(views.NewReportView, self).get_context_data(**kwargs)
+        context["drafts"] = drafts
+        context["viewer"] = self.viewer
+        return context
+
+
+class EditReportView(AsyncFormViewMixin, views.EditReportView):
+    @token_required
+    async def form_valid(self, form, token):
+        self.id = await mutations.async_update_report(
+            settings.OPENLOBBY_API_URL, form.cleaned_data, token=token
+        )
+        self.is_draft = form.cleaned_data["is_draft"]
+        return FormMixin.form_valid(self, form)
+
+    @viewer_required
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        report, viewer = await queries.async_get_report(
+            settings.OPENLOBBY_API_URL, self.kwargs["id"], token=token
+        )
+        self.check_report(report, viewer)
+        context = super(views.EditReportView, self).get_context_data(**kwargs)
+        return self.extend_context(context)
+
+
+class AboutView(AsyncTemplateViewMixin, views.AboutView):
+    @get_token
+    async def get_context_data(self, token, **kwargs):
+        context = super(views.AboutView, self).get_context_data(**kwargs)
+        context["viewer"] = await queries.async_get_viewer(
+            settings.OPENLOBBY_API_URL, token=token
+        )
+        return context
+
+
+# views without calls to Open Lobby Server
+LoginRedirectView = views.LoginRedirectView
+LogoutView = views.LogoutView
@@ -0,0 +1,191 @@
+from asgiref.sync import sync_to_async
+from collections import OrderedDict
+from django.conf import settings
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from .tokens import get_expiration
+from .utils import get_app_version
+
+
+# whitespace outside of string literals
+WHITESPACE_RE = re.compile(r'("(?:[^"\\]|\\.)*")|\s+')
+
+
+def normalize_query(query):
+    return WHITESPACE_RE.sub(lambda m: m.group(1) or " ", query).strip()
+
+
+def make_key(api_url, document_hash, variables=None):
+    """Returns cache key of query given by hash of its document (documents are
+    normalized, see Document).
+    """
+    key = json.dumps(
+        [api_url, document_hash, variables],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Thread safe in-process LRU cache of bytes with TTL. Cache is bounded by
+    total size of cached values in bytes.
+    """
+
+    # cache is in memory of process, its calls don't wait for I/O
+    shared = False
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        if ttl <= 0 or len(value) > self.max_size:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self.size += len(value)
+            while self.size > self.max_size:
+                old_key = next(iter(self._entries))
+                self._remove(old_key)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def delete_prefix(self, prefix):
+        """Deletes all keys starting with prefix."""
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        """Removes all entries and resets statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def close(self):
+        """Nothing to release, it's here for interface of SharedCache."""
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key):
+        expires, value = self._entries.pop(key)
+        self.size -= len(value)
+
+
+def get_shared_cache_path():
+    """Returns path of shared cache database of deployed version, caches of
+    previous deploy may keep pages rendered by old code.
+    """
+    root, ext = os.path.splitext(settings.SHARED_CACHE_PATH)
+    return f"{root}.{get_app_version()}{ext}"
+
+
+def create_cache(name, max_size):
+    """Returns in-process cache or cache shared by worker processes of host if
+    SHARED_CACHE_PATH is set.
+    """
+    if settings.SHARED_CACHE_PATH and max_size > 0:
+        from .shared_cache import SharedCache
+
+        return SharedCache(get_shared_cache_path(), name, max_size)
+    return ResponseCache(max_size)
+
+
+async def call_with_cache(cache, function, *args):
+    """Calls function which uses cache from async code. Shared cache waits for
+    lock of its database, it's called in thread not to block event loop.
+    """
+    if cache.shared:
+        return await sync_to_async(function, thread_sensitive=False)(*args)
+    return function(*args)
+
+
+response_cache = create_cache("query", settings.QUERY_CACHE_SIZE)
+
+
+def get_query_ttl(name):
+    if name is None:
+        return 0
+    return settings.QUERY_CACHE_TTL.get(name, 0)
+
+
+viewer_cache = ResponseCache(settings.VIEWER_CACHE_SIZE)
+
+
+def get_token_key(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_viewer_ttl(token):
+    """Returns how long viewer of token can be cached, never after token
+    expiration.
+    """
+    expiration = get_expiration(token)
+    if expiration is None:
+        return 0
+    return min(settings.VIEWER_CACHE_TTL, expiration - time.time())
+
+
+def get_cached_viewer(token):
+    """Returns viewer data (as returned by API) of token or None."""
+    if token is None:
+        return None
+    content = viewer_cache.get(get_token_key(token))
+    if content is None:
+        return None
+    return json.loads(content)
+
+
+def set_cached_viewer(token, viewer):
+    if token is None or viewer is None:
+        return
+    content = json.dumps(viewer).encode("utf-8")
+    viewer_cache.set(get_token_key(token), content, get_viewer_ttl(token))
+
+
+def delete_cached_viewer(token):
+    if token is not None:
+        viewer_cache.delete(get_token_key(token))
@@ -0,0 +1,167 @@
+"""Circuit breaker of requests to Open Lobby Server. When too many requests
+fail, the circuit opens and requests fail fast without waiting for timeouts,
+so workers are not tied up by unavailable server. After a while a few probe
+requests are let through and the circuit closes again if they succeed.
+"""
+
+from collections import deque
+from django.conf import settings
+import threading
+import time
+
+
+class Probe:
+    """Permit of probe call in half-open circuit. Probes of earlier half-open
+    state (before circuit opened again) are not counted.
+    """
+
+    def __init__(self, episode):
+        self.episode = episode
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self, *, failure_rate=0.5, min_calls=10, window=30, open_time=15, probes=1
+    ):
+        # circuit opens when at least failure_rate of at least min_calls
+        # calls in last window seconds failed
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        # after open_time seconds probes calls are let through
+        self.open_time = open_time
+        self.probes = probes
+
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._calls = deque()
+        self._failures = 0
+        self._probing = 0
+        self._probe_successes = 0
+        # count of transitions to half-open state
+        self._episode = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.min_calls > 0
+
+    def allow(self):
+        """Returns permit of call (true value, Probe in half-open circuit) or
+        False if call can't be made. Every allowed call must be followed by
+        record with the permit.
+        """
+        if not self.enabled:
+            return True
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_time:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = 0
+                self._probe_successes = 0
+                self._episode += 1
+
+            # half-open, let through limited number of probes
+            if self._probing + self._probe_successes >= self.probes:
+                return False
+            self._probing += 1
+            return Probe(self._episode)
+
+    def is_available(self):
+        """Returns if calls would be let through, without reserving a probe."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.open_time
+            return True
+
+    def record(self, success, permit):
+        """Records result of call allowed by permit."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+
+            if isinstance(permit, Probe):
+                if self.state != self.HALF_OPEN or permit.episode != self._episode:
+                    return
+                self._probing -= 1
+                if not success:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probes:
+                        self._close()
+                return
+
+            if self.state != self.CLOSED:
+                # call allowed before circuit opened doesn't decide probes
+                return
+
+            self._calls.append((now, success))
+            if not success:
+                self._failures += 1
+            self._prune(now)
+
+            calls = len(self._calls)
+            if calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+                self._open(now)
+
+    def retry_after(self):
+        """Returns seconds until circuit lets probes through."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0
+            return max(self.open_time - (time.monotonic() - self.opened_at), 0)
+
+    def reset(self):
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": len(self._calls),
+                "failures": self._failures,
+            }
+
+    def _prune(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            timestamp, success = self._calls.popleft()
+            if not success:
+                self._failures -= 1
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self.opened_at = now
+        self._calls.clear()
+        self._failures = 0
+
+    def _close(self):
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._calls.clear()
+        self._failures = 0
+        self._probing = 0
+        self._probe_successes = 0
+
+
+circuit_breaker = CircuitBreaker(
+    failure_rate=settings.OPENLOBBY_API_CIRCUIT_FAILURE_RATE,
+    min_calls=settings.OPENLOBBY_API_CIRCUIT_MIN_CALLS,
+    window=settings.OPENLOBBY_API_CIRCUIT_WINDOW,
+    open_time=settings.OPENLOBBY_API_CIRCUIT_OPEN_TIME,
+    probes=settings.OPENLOBBY_API_CIRCUIT_PROBES,
+)
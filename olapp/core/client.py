@@ -0,0 +1,101 @@
+from http.cookiejar import DefaultCookiePolicy
+import asyncio
+import os
+import threading
+import weakref
+from django.conf import settings
+
+
+# session (and its connection pool) is shared by threads of worker process
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+# asynchronous clients can't be shared by event loops
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def create_session():
+    """Creates HTTP session with keep-alive connection pool to Open Lobby Server."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    # session is shared by all requests of worker, never keep cookies of one
+    # user for the others
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.OPENLOBBY_API_POOL_SIZE,
+        max_retries=settings.OPENLOBBY_API_MAX_RETRIES,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Returns HTTP session of current worker process. Session is created again
+    after fork, so workers never share pooled connections. It's thread-safe,
+    threads of worker share one session.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = create_session()
+            _session_pid = pid
+        return _session
+
+
+def close_session():
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def get_timeout():
+    return (settings.OPENLOBBY_API_CONNECT_TIMEOUT, settings.OPENLOBBY_API_READ_TIMEOUT)
+
+
+def create_async_client():
+    """Creates asynchronous HTTP client with keep-alive connection pool to Open
+    Lobby Server.
+    """
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=settings.OPENLOBBY_API_POOL_SIZE,
+        max_keepalive_connections=settings.OPENLOBBY_API_POOL_SIZE,
+    )
+    transport = httpx.AsyncHTTPTransport(
+        limits=limits, retries=settings.OPENLOBBY_API_MAX_RETRIES
+    )
+    timeout = httpx.Timeout(
+        settings.OPENLOBBY_API_READ_TIMEOUT,
+        connect=settings.OPENLOBBY_API_CONNECT_TIMEOUT,
+    )
+    client = httpx.AsyncClient(transport=transport, timeout=timeout)
+    client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return client
+
+
+def get_async_client():
+    """Returns asynchronous HTTP client of running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = create_async_client()
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
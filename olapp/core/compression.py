@@ -0,0 +1,106 @@
+"""Compression of responses by brotli or gzip, negotiated by Accept-Encoding
+header of request.
+"""
+
+from django.conf import settings
+import brotli
+import re
+import zlib
+
+
+# preferred first
+ENCODINGS = ("br", "gzip")
+
+COMPRESSIBLE_TYPES_RE = re.compile(
+    r"^(text/|application/(json|javascript|xml|xhtml\+xml)|image/svg\+xml)"
+)
+
+
+def get_qualities(header):
+    """Returns dict of encodings in Accept-Encoding header and their quality
+    (q parameter, 1 by default).
+    """
+    qualities = {}
+    for item in header.lower().split(","):
+        encoding, _, params = item.partition(";")
+        encoding = encoding.strip()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if encoding:
+            qualities[encoding] = quality
+    return qualities
+
+
+def choose_encoding(header):
+    """Returns encoding with the highest quality accepted by Accept-Encoding
+    header or None. Quality of explicitly listed encoding overrides "*" (so
+    q=0 refuses it), ties are broken by order of ENCODINGS.
+    """
+    qualities = get_qualities(header)
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(response):
+    """Checks if response is worth compressing. Short, empty, not modified and
+    already encoded responses aren't.
+    """
+    if response.status_code in (204, 304) or response.has_header("Content-Encoding"):
+        return False
+    if "no-transform" in response.get("Cache-Control", ""):
+        return False
+    if not COMPRESSIBLE_TYPES_RE.match(response.get("Content-Type", "")):
+        return False
+    if response.streaming:
+        return True
+    return len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+
+def make_compressor(encoding):
+    if encoding == "br":
+        return brotli.Compressor(
+            mode=brotli.MODE_TEXT, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    # wbits 31 makes gzip container
+    return zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(
+            content,
+            mode=brotli.MODE_TEXT,
+            quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+    compressor = make_compressor(encoding)
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Compresses chunks of streaming response. Every chunk is flushed, so
+    client gets it without waiting for the rest.
+    """
+    compressor = make_compressor(encoding)
+    if encoding == "br":
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
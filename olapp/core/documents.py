@@ -0,0 +1,31 @@
+import hashlib
+
+from .cache import normalize_query
+
+
+class Document:
+    """GraphQL document built once at import. It takes all arguments from
+    variables, so its text never changes and server can parse and cache it
+    by its hash.
+    """
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = normalize_query(text)
+        self.hash = hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+    def __repr__(self):
+        return f"<Document {self.name} {self.hash[:12]}>"
+
+
+# registry of all documents by operation name, it's filled at import and only
+# read later, so threads share it without locking
+documents = {}
+
+
+def register(name, text):
+    if name in documents:
+        raise ValueError(f"Document '{name}' is already registered.")
+    document = Document(name, text)
+    documents[name] = document
+    return document
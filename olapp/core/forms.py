@@ -1,7 +1,7 @@
 from datetime import date
 from django import forms
 
-from .sanitizers import extract_text, strip_all_tags
+from .sanitizers import extract_text, strip_all_tags_fields
 
 
 INPUT_CLASS = "form-control form-control-sm"
@@ -77,25 +77,18 @@ class ReportForm(ErrorClassMixin, forms.Form):
         widget=forms.TextInput(attrs={"class": INPUT_CLASS}),
     )
 
+    # fields which can't contain any HTML tags
+    text_fields = (
+        "title",
+        "body",
+        "received_benefit",
+        "provided_benefit",
+        "our_participants",
+        "other_participants",
+    )
+
     def clean(self):
         cleaned_data = super().clean()
+        strip_all_tags_fields(cleaned_data, self.text_fields)
         cleaned_data["is_draft"] = "publish" not in self.data
         return cleaned_data
-
-    def clean_title(self):
-        return strip_all_tags(self.cleaned_data["title"])
-
-    def clean_body(self):
-        return strip_all_tags(self.cleaned_data["body"])
-
-    def clean_received_benefit(self):
-        return strip_all_tags(self.cleaned_data["received_benefit"])
-
-    def clean_provided_benefit(self):
-        return strip_all_tags(self.cleaned_data["provided_benefit"])
-
-    def clean_our_participants(self):
-        return strip_all_tags(self.cleaned_data["our_participants"])
-
-    def clean_other_participants(self):
-        return strip_all_tags(self.cleaned_data["other_participants"])
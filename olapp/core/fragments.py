@@ -0,0 +1,57 @@
+"""Cache of rendered report snippets. Snippet of the same report looks the same
+in search results, author's reports and report page, so it's rendered once and
+reused by all of them.
+"""
+
+from django.conf import settings
+from django.template.loader import get_template
+import hashlib
+import json
+
+from .cache import create_cache
+
+
+REPORT_SNIPPET_TEMPLATE = "core/report_snippet.html"
+
+fragment_cache = create_cache("fragment", settings.FRAGMENT_CACHE_SIZE)
+
+
+def get_report_prefix(id):
+    return f"report_snippet:{id}:"
+
+
+def get_report_snippet_key(report, *, viewer=None, highlight="", is_revision=False):
+    """Returns key of report snippet. Content of report is versioned by its
+    edited time, search results differ by highlighted query. Author's name is
+    not versioned and viewer sees edit link of his reports.
+    """
+    author = report["author"]
+    is_viewers = viewer is not None and author["id"] == viewer["id"]
+    parts = [
+        str(report["edited"]),
+        highlight,
+        is_revision,
+        is_viewers,
+        [author[field] for field in ("firstName", "lastName", "hasCollidingName")],
+    ]
+    data = json.dumps(parts, separators=(",", ":"))
+    digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+    return get_report_prefix(report["id"]) + digest
+
+
+def render_report_snippet(report, *, viewer=None, highlight="", is_revision=False):
+    key = get_report_snippet_key(
+        report, viewer=viewer, highlight=highlight, is_revision=is_revision
+    )
+    content = fragment_cache.get(key)
+    if content is not None:
+        return content.decode("utf-8")
+
+    context = {"report": report, "viewer": viewer, "is_revision": is_revision}
+    html = get_template(REPORT_SNIPPET_TEMPLATE).render(context)
+    fragment_cache.set(key, html.encode("utf-8"), settings.FRAGMENT_CACHE_TTL)
+    return html
+
+
+def delete_report_fragments(id):
+    fragment_cache.delete_prefix(get_report_prefix(id))
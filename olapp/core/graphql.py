@@ -1,12 +1,28 @@
-import arrow
 import base64
 import json
-import requests
+from collections.abc import Mapping
+from datetime import datetime, timezone
 from django.conf import settings
+from django.utils.timezone import get_default_timezone
+
+from .cache import (
+    call_with_cache,
+    delete_cached_viewer,
+    get_cached_viewer,
+    get_query_ttl,
+    make_key,
+    response_cache,
+    set_cached_viewer,
+)
+from .circuit import circuit_breaker
+from .client import get_async_client, get_session, get_timeout
+from .documents import register
+from .metrics import measure_api_call, record_api_cache_hit
+from .recording import recorder
 
 
 VIEWER = """
-    viewer {
+    viewer @include(if: $withViewer) {
         id
         firstName
         lastName
@@ -23,6 +39,10 @@ class ServiceUnavailableError(Exception):
     pass
 
 
+class CircuitOpenError(ServiceUnavailableError):
+    """Open Lobby Server is failing, request was not even sent."""
+
+
 class InvalidTokenError(Exception):
     pass
 
@@ -48,36 +68,158 @@ def encode_cursor(num):
     return base64.b64encode(str(num).encode("utf-8")).decode("utf-8")
 
 
+def parse_datetime(value):
+    """Parses ISO 8601 date time from API. It's fast for formats known by
+    datetime.fromisoformat, others are parsed by arrow.
+    """
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        import arrow
+
+        return arrow.get(value).datetime
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def local_datetime_decoder():
+    """Returns function which decodes date time from API to local time zone.
+    It decodes each distinct value just once.
+    """
+    tz = get_default_timezone()
+    decoded = {}
+
+    def decode(value):
+        dt = decoded.get(value)
+        if dt is None:
+            dt = decoded[value] = parse_datetime(value).astimezone(tz)
+        return dt
+
+    return decode
+
+
+class LazyNode(Mapping):
+    """Node from API which decodes its fields on first access and caches
+    them. Templates usually need just a few fields, so the others are never
+    decoded. It behaves like read-write dict of fields.
+    """
+
+    __slots__ = ("_data", "_decoded")
+
+    # field name -> name of method decoding its raw value
+    decoders = {}
+
+    def __init__(self, data):
+        self._data = data
+        self._decoded = None
+
+    def __getitem__(self, key):
+        if self._decoded is not None and key in self._decoded:
+            return self._decoded[key]
+        value = self._data[key]
+        decoder = self.decoders.get(key)
+        if decoder is None:
+            return value
+        value = getattr(self, decoder)(value)
+        self[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if self._decoded is None:
+            self._decoded = {}
+        self._decoded[key] = value
+
+    def __contains__(self, key):
+        return key in self._data or (self._decoded is not None and key in self._decoded)
+
+    def __iter__(self):
+        yield from self._data
+        if self._decoded is not None:
+            for key in self._decoded:
+                if key not in self._data:
+                    yield key
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._data.get('id')}>"
+
+    def decode_id(self, value):
+        type, id = decode_global_id(value)
+        return id
+
+    def decode_extra(self, value):
+        if value is None:
+            return None
+        return json.loads(value)
+
+
+class LazyUser(LazyNode):
+    __slots__ = ()
+
+    decoders = {"id": "decode_id", "extra": "decode_extra"}
+
+
+class LazyReport(LazyNode):
+    __slots__ = ("_decode_datetime",)
+
+    decoders = {
+        "id": "decode_id",
+        "extra": "decode_extra",
+        "date": "decode_date",
+        "published": "decode_datetime",
+        "edited": "decode_datetime",
+        "author": "decode_author",
+        "revisions": "decode_revisions",
+    }
+
+    def __init__(self, data, decode_datetime=None):
+        super().__init__(data)
+        self._decode_datetime = decode_datetime
+
+    def get_datetime_decoder(self):
+        if self._decode_datetime is None:
+            self._decode_datetime = local_datetime_decoder()
+        return self._decode_datetime
+
+    def decode_date(self, value):
+        return self.get_datetime_decoder()(value).date()
+
+    def decode_datetime(self, value):
+        return self.get_datetime_decoder()(value)
+
+    def decode_author(self, value):
+        if value is None:
+            return None
+        return LazyUser(value)
+
+    def decode_revisions(self, value):
+        decode_datetime = self.get_datetime_decoder()
+        return [LazyReport(rev, decode_datetime) for rev in value]
+
+
 def pythonize_user(user):
-    type, id = decode_global_id(user["id"])
-    user["id"] = id
-    if user["extra"] is not None:
-        user["extra"] = json.loads(user["extra"])
-    return user
+    return LazyUser(user)
 
 
 def pythonize_author(author):
     return pythonize_user(author)
 
 
-def pythonize_report(report):
-    type, id = decode_global_id(report["id"])
-    report["id"] = id
-    if "extra" in report and report["extra"] is not None:
-        report["extra"] = json.loads(report["extra"])
-    if "date" in report:
-        report["date"] = arrow.get(report["date"]).to(settings.TIME_ZONE).date()
-    if "published" in report:
-        report["published"] = (
-            arrow.get(report["published"]).to(settings.TIME_ZONE).datetime
-        )
-    if "edited" in report:
-        report["edited"] = arrow.get(report["edited"]).to(settings.TIME_ZONE).datetime
-    if "author" in report and report["author"] is not None:
-        report["author"] = pythonize_author(report["author"])
-    if "revisions" in report:
-        report["revisions"] = [pythonize_report(rev) for rev in report["revisions"]]
-    return report
+def pythonize_report(report, *, decode_datetime=None):
+    return LazyReport(report, decode_datetime)
+
+
+def pythonize_report_edges(edges):
+    """Pythonizes reports of connection edges, they share date time decoder."""
+    decode_datetime = local_datetime_decoder()
+    for edge in edges:
+        edge["node"] = pythonize_report(edge["node"], decode_datetime=decode_datetime)
+    return edges
 
 
 def get_viewer_from_data(data):
@@ -87,50 +229,410 @@ def get_viewer_from_data(data):
     return pythonize_user(viewer)
 
 
-def call_api(api_url, query, *, variables=None, token=None):
-    if token is not None:
-        headers = {"Authorization": f"Bearer {token}"}
-    else:
-        headers = {}
+def register_query(name, query, *, variables=""):
+    """Registers document of query extended with viewer selection. Query
+    variables are declared in GraphQL syntax, e.g.: "$id: ID!, $first: Int".
+    """
+    if variables:
+        variables += ", "
+    text = f"""
+query {name} ({variables}$withViewer: Boolean!) {{
+    {query}
+    {VIEWER}
+}}"""
+    return register(name, text)
+
+
+VIEWER_QUERY = register_query("viewer", "")
+
+# responses of proxy in front of unavailable server
+UNAVAILABLE_STATUS_CODES = {502, 503, 504}
 
-    payload = {"query": query, "variables": variables}
+# errors of server which doesn't know persisted query (or doesn't support them)
+UNKNOWN_PERSISTED_QUERY_CODES = {
+    "PERSISTED_QUERY_NOT_FOUND",
+    "PERSISTED_QUERY_NOT_SUPPORTED",
+}
+UNKNOWN_PERSISTED_QUERY_MESSAGES = {
+    "PersistedQueryNotFound",
+    "PersistedQueryNotSupported",
+}
+# response content without any of them isn't parsed to look for the errors
+UNKNOWN_PERSISTED_QUERY_MARKERS = (b"PersistedQuery", b"PERSISTED_QUERY_")
 
+
+def get_headers(token):
+    if token is not None:
+        return {"Authorization": f"Bearer {token}"}
+    return {}
+
+
+class ApiCall:
+    """Single request to API. It's shared by synchronous and asynchronous API
+    clients which only send the request over network.
+    """
+
+    def __init__(self, api_url, document, *, variables=None, token=None, cache=None):
+        self.api_url = api_url
+        self.document = document
+        self.variables = variables
+        self.token = token
+        # with persisted queries we send only hash of document until server
+        # asks for its text
+        self.persisted = settings.OPENLOBBY_API_PERSISTED_QUERIES
+        self.send_text = not self.persisted
+        # only anonymous responses are cached, they are the same for everybody
+        self.ttl = get_query_ttl(cache) if token is None else 0
+        if self.ttl:
+            self.cache_key = make_key(api_url, document.hash, variables)
+
+    @property
+    def headers(self):
+        return get_headers(self.token)
+
+    @property
+    def payload(self):
+        payload = {"variables": self.variables, "operationName": self.document.name}
+        if self.send_text:
+            payload["query"] = self.document.text
+        if self.persisted:
+            payload["extensions"] = {
+                "persistedQuery": {"version": 1, "sha256Hash": self.document.hash}
+            }
+        return payload
+
+    def is_unknown_persisted_query(self, status_code, content):
+        """Checks if server doesn't know document sent only by hash."""
+        if self.send_text:
+            return False
+        if not any(marker in content for marker in UNKNOWN_PERSISTED_QUERY_MARKERS):
+            return False
+        try:
+            content = json.loads(content)
+        except ValueError:
+            return False
+        return self.is_unknown_persisted_query_content(content)
+
+    def is_unknown_persisted_query_content(self, content):
+        if self.send_text:
+            return False
+        for error in content.get("errors", []):
+            code = error.get("extensions", {}).get("code")
+            if code in UNKNOWN_PERSISTED_QUERY_CODES:
+                return True
+            if error.get("message") in UNKNOWN_PERSISTED_QUERY_MESSAGES:
+                return True
+        return False
+
+    def get_cached_data(self):
+        if not self.ttl:
+            return None
+        content = response_cache.get(self.cache_key)
+        if content is None:
+            return None
+        return json.loads(content)["data"]
+
+    def check_status(self, status_code):
+        # unauthorized? it's wrong token
+        if status_code == 401:
+            delete_cached_viewer(self.token)
+            raise InvalidTokenError()
+        if status_code in UNAVAILABLE_STATUS_CODES:
+            raise ServiceUnavailableError()
+
+    def process_response(self, status_code, content):
+        self.check_status(status_code)
+        return self.process_content(json.loads(content), content)
+
+    def process_content(self, content, raw_content=None):
+        if "errors" in content:
+            raise GraphQLError(content["errors"])
+
+        if self.ttl:
+            if raw_content is None:
+                raw_content = json.dumps(content).encode("utf-8")
+            response_cache.set(self.cache_key, raw_content, self.ttl)
+
+        return content["data"]
+
+
+# HTTP clients are imported lazily, WSGI worker uses just requests and ASGI
+# worker just httpx
+
+
+def _post(api_url, payload, headers):
+    import requests
+
+    permit = circuit_breaker.allow()
+    if not permit:
+        raise CircuitOpenError
+    success = False
     try:
-        response = requests.post(api_url, json=payload, headers=headers)
+        response = get_session().post(
+            api_url, json=payload, headers=headers, timeout=get_timeout()
+        )
+        success = response.status_code < 500
     except requests.exceptions.RequestException:
         raise ServiceUnavailableError
+    finally:
+        circuit_breaker.record(success, permit)
+    if recorder is not None:
+        recorder.record(payload, headers, response.status_code, response.content)
+    return response.status_code, response.content
 
-    # unauthorized? it's wrong token
-    if response.status_code == 401:
-        raise InvalidTokenError()
 
-    content = response.json()
+async def _async_post(api_url, payload, headers):
+    import httpx
 
-    if "errors" in content:
-        raise GraphQLError(content["errors"])
+    permit = circuit_breaker.allow()
+    if not permit:
+        raise CircuitOpenError
+    success = False
+    try:
+        response = await get_async_client().post(api_url, json=payload, headers=headers)
+        success = response.status_code < 500
+    except httpx.HTTPError:
+        raise ServiceUnavailableError
+    finally:
+        circuit_breaker.record(success, permit)
+    if recorder is not None:
+        recorder.record(payload, headers, response.status_code, response.content)
+    return response.status_code, response.content
+
+
+def call_api(api_url, document, *, variables=None, token=None, cache=None):
+    call = ApiCall(api_url, document, variables=variables, token=token, cache=cache)
+
+    data = call.get_cached_data()
+    if data is not None:
+        record_api_cache_hit(document.name)
+        return data
+
+    with measure_api_call(document.name) as stats:
+        status_code, content = _post(api_url, call.payload, call.headers)
+        if call.is_unknown_persisted_query(status_code, content):
+            call.send_text = True
+            status_code, content = _post(api_url, call.payload, call.headers)
+
+        stats["size"] = len(content)
+        return call.process_response(status_code, content)
+
+
+async def async_call_api(api_url, document, *, variables=None, token=None, cache=None):
+    call = ApiCall(api_url, document, variables=variables, token=token, cache=cache)
+
+    data = await call_with_cache(response_cache, call.get_cached_data)
+    if data is not None:
+        record_api_cache_hit(document.name)
+        return data
+
+    with measure_api_call(document.name) as stats:
+        status_code, content = await _async_post(api_url, call.payload, call.headers)
+        if call.is_unknown_persisted_query(status_code, content):
+            call.send_text = True
+            status_code, content = await _async_post(
+                api_url, call.payload, call.headers
+            )
+
+        stats["size"] = len(content)
+        return await call_with_cache(
+            response_cache, call.process_response, status_code, content
+        )
 
-    return content["data"]
 
+def prepare_query(document, *, variables=None, token=None):
+    """Returns query variables and cached viewer. Viewer is not queried again
+    if we know it already. Variables are None if there is nothing to query.
+    """
+    cached_viewer = get_cached_viewer(token)
+    if cached_viewer is not None and document is VIEWER_QUERY:
+        return None, cached_viewer
 
-def call_query(api_url, query, *, viewer=VIEWER, variables=None, token=None):
-    query_ = f"""
-query {{
-    {query}
-    {viewer}
-}}"""
-    data = call_api(api_url, query_, variables=variables, token=token)
+    variables = dict(variables or {}, withViewer=cached_viewer is None)
+    return variables, cached_viewer
+
+
+def get_query_result(data, *, token=None, cached_viewer=None):
+    if cached_viewer is not None:
+        return data, pythonize_user(cached_viewer)
+
+    set_cached_viewer(token, data.get("viewer"))
     viewer = get_viewer_from_data(data)
     return data, viewer
 
 
-def call_mutation(api_url, mutation, *, variables=None, token=None):
-    data = call_api(api_url, mutation, variables=variables, token=token)
+def call_query(api_url, document, *, variables=None, token=None, cache=None):
+    variables, cached_viewer = prepare_query(document, variables=variables, token=token)
+    if variables is None:
+        data = {}
+    else:
+        data = call_api(
+            api_url, document, variables=variables, token=token, cache=cache
+        )
+    return get_query_result(data, token=token, cached_viewer=cached_viewer)
+
+
+async def async_call_query(
+    api_url, document, *, variables=None, token=None, cache=None
+):
+    variables, cached_viewer = prepare_query(document, variables=variables, token=token)
+    if variables is None:
+        data = {}
+    else:
+        data = await async_call_api(
+            api_url, document, variables=variables, token=token, cache=cache
+        )
+    return get_query_result(data, token=token, cached_viewer=cached_viewer)
+
+
+def call_mutation(api_url, document, *, variables=None, token=None):
+    data = call_api(api_url, document, variables=variables, token=token)
     return data
 
 
-def str_argument(value):
-    return f'"{value}"'
+async def async_call_mutation(api_url, document, *, variables=None, token=None):
+    data = await async_call_api(api_url, document, variables=variables, token=token)
+    return data
 
 
-def encode_arguments(arguments):
-    return ", ".join(f"{k}: {v}" for k, v in arguments.items())
+# operation name of batch request in metrics
+BATCH_OPERATION = "batch"
+
+
+class BatchOperation:
+    """Query in batch. Its result is available after the batch is executed."""
+
+    def __init__(self, call, cached_viewer, result):
+        self.call = call
+        self.cached_viewer = cached_viewer
+        self.result = result
+        self.data = None
+        self.error = None
+        self._value = None
+
+    def get(self):
+        """Returns query result and viewer or raises error of the query."""
+        if self.error is not None:
+            raise self.error
+        if self._value is None:
+            if self.data is None:
+                raise RuntimeError("Batch has not been executed yet.")
+            data, viewer = get_query_result(
+                self.data, token=self.call.token, cached_viewer=self.cached_viewer
+            )
+            if self.result is not None:
+                data = self.result(data)
+            self._value = data, viewer
+        return self._value
+
+
+class Batch:
+    """Collects several queries and sends them to API in one HTTP request as
+    JSON array batch. Results are split back to each query, e.g.:
+
+        batch = Batch(api_url, token=token)
+        report = queries.batch_get_report(batch, id)
+        drafts = queries.batch_get_report_drafts(batch)
+        batch.execute()
+        report, viewer = report.get()
+
+    Errors are raised per query by its get() method. Queries of cached
+    responses are not sent at all. Open Lobby Server has to accept batched
+    requests.
+    """
+
+    def __init__(self, api_url, *, token=None):
+        self.api_url = api_url
+        self.token = token
+        self.operations = []
+
+    def query(self, document, *, variables=None, cache=None, result=None):
+        """Adds query to batch. Optional result function converts query data
+        and may raise NotFoundError.
+        """
+        variables, cached_viewer = prepare_query(
+            document, variables=variables, token=self.token
+        )
+        call = None
+        if variables is not None:
+            call = ApiCall(
+                self.api_url,
+                document,
+                variables=variables,
+                token=self.token,
+                cache=cache,
+            )
+        operation = BatchOperation(call, cached_viewer, result)
+        self.operations.append(operation)
+        return operation
+
+    @property
+    def headers(self):
+        return get_headers(self.token)
+
+    def get_pending_operations(self):
+        pending = []
+        for operation in self.operations:
+            if operation.call is None:
+                # nothing to query, e.g. viewer is cached
+                operation.data = {}
+                continue
+            operation.data = operation.call.get_cached_data()
+            if operation.data is None:
+                pending.append(operation)
+        return pending
+
+    def process_response(self, operations, status_code, content):
+        """Splits batch response to operations. Returns operations which has
+        to be sent again with document text (unknown persisted queries).
+        """
+        if status_code == 401:
+            delete_cached_viewer(self.token)
+            raise InvalidTokenError()
+        if status_code in UNAVAILABLE_STATUS_CODES:
+            raise ServiceUnavailableError()
+
+        content = json.loads(content)
+        if not isinstance(content, list):
+            raise GraphQLError(content.get("errors"))
+
+        if len(content) < len(operations):
+            # results are matched by position, the rest has none
+            message = f"Batch has {len(content)} results of {len(operations)} queries."
+            error = GraphQLError([{"message": message}])
+            for operation in operations[len(content) :]:
+                operation.error = error
+
+        resend = []
+        for operation, item in zip(operations, content):
+            if operation.call.is_unknown_persisted_query_content(item):
+                operation.call.send_text = True
+                resend.append(operation)
+                continue
+            try:
+                operation.data = operation.call.process_content(item)
+            except GraphQLError as error:
+                operation.error = error
+        return resend
+
+    def execute(self):
+        pending = self.get_pending_operations()
+        while pending:
+            payload = [operation.call.payload for operation in pending]
+            with measure_api_call(BATCH_OPERATION) as stats:
+                status_code, content = _post(self.api_url, payload, self.headers)
+                stats["size"] = len(content)
+                pending = self.process_response(pending, status_code, content)
+
+    async def async_execute(self):
+        pending = await call_with_cache(response_cache, self.get_pending_operations)
+        while pending:
+            payload = [operation.call.payload for operation in pending]
+            with measure_api_call(BATCH_OPERATION) as stats:
+                status_code, content = await _async_post(
+                    self.api_url, payload, self.headers
+                )
+                stats["size"] = len(content)
+                pending = await call_with_cache(
+                    response_cache, self.process_response, pending, status_code, content
+                )
@@ -0,0 +1,242 @@
+"""Metrics of requests to Open Lobby Server and of views. Durations of current
+request are reported in Server-Timing header, metrics aggregated by worker
+process are exported in Prometheus text format.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+
+from .cache import response_cache, viewer_cache
+from .circuit import circuit_breaker
+from .fragments import fragment_cache
+from .stale import stale_cache
+
+
+# name -> (type, help)
+METRICS = {
+    "olapp_api_duration_seconds": (
+        "summary",
+        "Duration of requests to Open Lobby Server by operation.",
+    ),
+    "olapp_api_response_bytes_total": (
+        "counter",
+        "Size of responses of Open Lobby Server by operation.",
+    ),
+    "olapp_api_errors_total": (
+        "counter",
+        "Failed requests to Open Lobby Server by operation.",
+    ),
+    "olapp_api_cache_hits_total": (
+        "counter",
+        "Operations answered from query cache.",
+    ),
+    "olapp_view_duration_seconds": (
+        "summary",
+        "Duration of views by phase (view, render and total).",
+    ),
+    "olapp_view_responses_total": ("counter", "Responses of views by status code."),
+}
+
+
+class Registry:
+    """Thread safe registry of summaries and counters with labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (name, labels) -> [count, sum] or value
+        self._summaries = defaultdict(lambda: [0, 0.0])
+        self._counters = defaultdict(float)
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self._summaries[key]
+            summary[0] += 1
+            summary[1] += value
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def clear(self):
+        with self._lock:
+            self._summaries.clear()
+            self._counters.clear()
+
+    def collect(self):
+        """Returns samples as (name, labels, value) sorted by name."""
+        with self._lock:
+            samples = []
+            for (name, labels), (count, total) in self._summaries.items():
+                samples.append((name + "_count", labels, count))
+                samples.append((name + "_sum", labels, total))
+            for (name, labels), value in self._counters.items():
+                samples.append((name, labels, value))
+        return sorted(samples)
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    """Timings of single request for Server-Timing header."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_end = None
+        self.entries = []
+
+    def add(self, name, duration, description=None):
+        self.entries.append((name, duration, description))
+
+    def header(self):
+        items = []
+        for name, duration, description in self.entries:
+            item = f"{name};dur={duration * 1000:.1f}"
+            if description is not None:
+                item += f';desc="{description}"'
+            items.append(item)
+        return ", ".join(items)
+
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request():
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def end_request():
+    _request_timings.set(None)
+
+
+def get_request_timings():
+    return _request_timings.get()
+
+
+@contextmanager
+def measure_api_call(operation):
+    """Measures request to Open Lobby Server. Set size of response to
+    yielded dict.
+    """
+    stats = {"size": 0}
+    start = time.perf_counter()
+    try:
+        yield stats
+    except Exception:
+        registry.inc("olapp_api_errors_total", operation=operation)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        registry.observe("olapp_api_duration_seconds", duration, operation=operation)
+        timings = get_request_timings()
+        if timings is not None:
+            timings.add("api", duration, operation)
+    registry.inc("olapp_api_response_bytes_total", stats["size"], operation=operation)
+
+
+def record_api_cache_hit(operation):
+    registry.inc("olapp_api_cache_hits_total", operation=operation)
+
+
+def record_view(view, status_code, timings):
+    """Records phases of view from request timings."""
+    end = time.perf_counter()
+    total = end - timings.start
+    phases = []
+    if timings.view_end is not None:
+        phases.append(("view", timings.view_end - timings.start))
+        phases.append(("render", end - timings.view_end))
+    phases.append(("total", total))
+    for phase, duration in phases:
+        registry.observe(
+            "olapp_view_duration_seconds", duration, view=view, phase=phase
+        )
+        timings.add(phase, duration)
+    registry.inc("olapp_view_responses_total", view=view, status=status_code)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    items = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        items.append(f'{key}="{value}"')
+    return "{" + ",".join(items) + "}"
+
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+# stats key of cache -> (metric name, type, help)
+CACHE_METRICS = {
+    "entries": ("olapp_cache_entries", "gauge", "Entries in cache."),
+    "size": ("olapp_cache_size_bytes", "gauge", "Size of cached values in bytes."),
+    "hits": ("olapp_cache_hits_total", "counter", "Cache hits."),
+    "misses": ("olapp_cache_misses_total", "counter", "Cache misses."),
+    "evictions": (
+        "olapp_cache_evictions_total",
+        "counter",
+        "Entries evicted from cache to free space.",
+    ),
+}
+
+CACHES = {
+    "query": response_cache,
+    "viewer": viewer_cache,
+    "fragment": fragment_cache,
+    "stale": stale_cache,
+}
+
+
+def collect_caches():
+    """Returns samples of caches and circuit breaker as (name, type, help,
+    labels, value).
+    """
+    stats = {cache_name: cache.stats() for cache_name, cache in CACHES.items()}
+    samples = []
+    for key, (name, type, help) in CACHE_METRICS.items():
+        for cache_name in CACHES:
+            labels = (("cache", cache_name),)
+            samples.append((name, type, help, labels, stats[cache_name][key]))
+    circuit_open = int(circuit_breaker.stats()["state"] != circuit_breaker.CLOSED)
+    help = "Circuit breaker of Open Lobby Server is not closed."
+    samples.append(("olapp_circuit_open", "gauge", help, (), circuit_open))
+    return samples
+
+
+def render_metrics():
+    """Returns metrics in Prometheus text format."""
+    lines = []
+    described = set()
+
+    def describe(name, type, help):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type}")
+
+    for name, labels, value in registry.collect():
+        base = name
+        for suffix in ("_count", "_sum"):
+            if name.endswith(suffix) and name[: -len(suffix)] in METRICS:
+                base = name[: -len(suffix)]
+        type, help = METRICS[base]
+        describe(base, type, help)
+        lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+    for name, type, help, labels, value in collect_caches():
+        describe(name, type, help)
+        lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+    return "\n".join(lines) + "\n"
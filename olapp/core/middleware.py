@@ -1,23 +1,109 @@
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.http import HttpResponse, HttpResponseRedirect
 from django.template import loader
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+import asyncio
+import math
+import time
 
-from .graphql import ServiceUnavailableError, InvalidTokenError
+from .circuit import circuit_breaker
+from .compression import choose_encoding, compress, compress_stream, is_compressible
+from .graphql import CircuitOpenError, ServiceUnavailableError, InvalidTokenError
+from .metrics import end_request, get_request_timings, record_view, start_request
+from .prefetch import prefetcher
+from .stale import (
+    get_stale_response,
+    is_stale_if_error,
+    refresh_response,
+    store_response,
+)
 from .utils import UnauthorizedError
 
 
-class CustomErrorResponsesMiddleware:
+class HybridMiddleware:
+    """Base of middleware which runs natively in synchronous (WSGI) and
+    asynchronous (ASGI) handler. Synchronous middleware in asynchronous handler
+    makes Django run the rest of chain in one thread, so requests would be
+    served one by one. Subclasses process response in process_response.
+    """
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # handler awaits it then (the same as MiddlewareMixin does)
+            self._is_coroutine = asyncio.coroutines._is_coroutine
 
     def __call__(self, request):
-        return self.get_response(request)
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        return response
+
+
+class CustomErrorResponsesMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.unavailable_content = None
+
+    def process_response(self, request, response):
+        if is_stale_if_error(request):
+            store_response(request, response)
+        if getattr(request, "delete_access_token", False):
+            # unless view has just set a new one
+            if settings.ACCESS_TOKEN_COOKIE not in response.cookies:
+                response.delete_cookie(settings.ACCESS_TOKEN_COOKIE)
+        return response
+
+    def get_stale_response(self, request):
+        """Returns last known good response if there is one. It's refreshed in
+        background when server is available again.
+        """
+        if getattr(request, "stale_refresh", False) or not is_stale_if_error(request):
+            return None
+        response = get_stale_response(request)
+        if response is not None and circuit_breaker.is_available():
+            # refresher runs it in its own thread
+            if self.is_async:
+                refresh_response(request, async_to_sync(self.__acall__))
+            else:
+                refresh_response(request, self)
+        return response
+
+    def get_unavailable_response(self):
+        # page is the same for everybody, render it once, it must be fast when
+        # all requests fail
+        if self.unavailable_content is None:
+            self.unavailable_content = loader.render_to_string("503.html")
+        return HttpResponse(self.unavailable_content, status=503)
 
     def process_exception(self, request, exception):
         if isinstance(exception, ServiceUnavailableError):
-            return HttpResponse(loader.render_to_string("503.html"), status=503)
+            response = self.get_stale_response(request)
+            if response is not None:
+                return response
+
+        if isinstance(exception, CircuitOpenError):
+            response = self.get_unavailable_response()
+            response["Retry-After"] = math.ceil(circuit_breaker.retry_after())
+            return response
+
+        if isinstance(exception, ServiceUnavailableError):
+            return self.get_unavailable_response()
 
         if isinstance(exception, UnauthorizedError):
             return redirect("login")
@@ -28,3 +114,137 @@ class CustomErrorResponsesMiddleware:
             return response
 
         return None
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise middleware which runs natively in asynchronous handler too."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Measures durations of view and template rendering and adds timings of
+    request to Server-Timing header (if metrics are enabled).
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.is_async:
+            # handler would run synchronous hook in thread
+            self.process_template_response = self.async_process_template_response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request()
+        return self.record(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request()
+        return self.record(request, response, timings)
+
+    def record(self, request, response, timings):
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            view = match.url_name
+        elif request.path.startswith(settings.STATIC_URL):
+            view = "static"
+        else:
+            view = "unmatched"
+        record_view(view, response.status_code, timings)
+        if settings.METRICS:
+            response["Server-Timing"] = timings.header()
+        return response
+
+    def process_template_response(self, request, response):
+        # template is rendered after this
+        timings = get_request_timings()
+        if timings is not None:
+            timings.view_end = time.perf_counter()
+        return response
+
+    async def async_process_template_response(self, request, response):
+        return MetricsMiddleware.process_template_response(self, request, response)
+
+
+class PrefetchMiddleware(HybridMiddleware):
+    """Counts requests which worker process serves at once, prefetch of next
+    page is skipped in busy worker.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        prefetcher.start_request()
+        try:
+            return self.get_response(request)
+        finally:
+            prefetcher.end_request()
+
+    async def __acall__(self, request):
+        prefetcher.start_request()
+        try:
+            return await self.get_response(request)
+        finally:
+            prefetcher.end_request()
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Compresses responses by brotli or gzip, whichever client accepts.
+    Static files are served precompressed by WhiteNoise before this.
+    """
+
+    def process_response(self, request, response):
+        if not is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ["Accept-Encoding"])
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response["Content-Length"]
+        else:
+            response.content = compress(response.content, encoding)
+            response["Content-Length"] = str(len(response.content))
+
+        # compressed content isn't byte-for-byte the same as entity
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = f"W/{etag}"
+
+        response["Content-Encoding"] = encoding
+        return response
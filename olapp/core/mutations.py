@@ -1,39 +1,95 @@
-from .graphql import call_mutation, encode_global_id, decode_global_id
+from .cache import call_with_cache
+from .documents import register
+from .fragments import delete_report_fragments, fragment_cache
+from .graphql import (
+    async_call_mutation,
+    call_mutation,
+    encode_global_id,
+    decode_global_id,
+)
 
 
-def login(api_url, openid_uid, redirect_uri):
-    mutation = f"""
-    mutation {{
-        login (input: {{ openidUid: "{openid_uid}", redirectUri: "{redirect_uri}" }}) {{
-            authorizationUrl
-        }}
-    }}
+LOGIN_MUTATION = register(
+    "login",
     """
-    data = call_mutation(api_url, mutation)
+    mutation login ($input: LoginInput!) {
+        login (input: $input) {
+            authorizationUrl
+        }
+    }
+    """,
+)
+
+
+def _login_variables(openid_uid, redirect_uri):
+    return {"input": {"openidUid": openid_uid, "redirectUri": redirect_uri}}
+
+
+def login(api_url, openid_uid, redirect_uri):
+    variables = _login_variables(openid_uid, redirect_uri)
+    data = call_mutation(api_url, LOGIN_MUTATION, variables=variables)
     return data["login"]
 
 
-def login_by_shortcut(api_url, shortcut_id, redirect_uri):
-    mutation = f"""
-    mutation {{
-        loginByShortcut (input: {{ shortcutId: "{shortcut_id}", redirectUri: "{redirect_uri}" }}) {{
-            authorizationUrl
-        }}
-    }}
+async def async_login(api_url, openid_uid, redirect_uri):
+    variables = _login_variables(openid_uid, redirect_uri)
+    data = await async_call_mutation(api_url, LOGIN_MUTATION, variables=variables)
+    return data["login"]
+
+
+LOGIN_BY_SHORTCUT_MUTATION = register(
+    "loginByShortcut",
     """
-    data = call_mutation(api_url, mutation)
+    mutation loginByShortcut ($input: LoginByShortcutInput!) {
+        loginByShortcut (input: $input) {
+            authorizationUrl
+        }
+    }
+    """,
+)
+
+
+def _login_by_shortcut_variables(shortcut_id, redirect_uri):
+    return {"input": {"shortcutId": shortcut_id, "redirectUri": redirect_uri}}
+
+
+def login_by_shortcut(api_url, shortcut_id, redirect_uri):
+    variables = _login_by_shortcut_variables(shortcut_id, redirect_uri)
+    data = call_mutation(api_url, LOGIN_BY_SHORTCUT_MUTATION, variables=variables)
     return data["loginByShortcut"]
 
 
-def logout(api_url, *, token=None):
-    mutation = """
-    mutation {
-        logout (input: {}) {
+async def async_login_by_shortcut(api_url, shortcut_id, redirect_uri):
+    variables = _login_by_shortcut_variables(shortcut_id, redirect_uri)
+    data = await async_call_mutation(
+        api_url, LOGIN_BY_SHORTCUT_MUTATION, variables=variables
+    )
+    return data["loginByShortcut"]
+
+
+LOGOUT_MUTATION = register(
+    "logout",
+    """
+    mutation logout ($input: LogoutInput!) {
+        logout (input: $input) {
             success
         }
     }
-    """
-    data = call_mutation(api_url, mutation, token=token)
+    """,
+)
+
+
+def logout(api_url, *, token=None):
+    variables = {"input": {}}
+    data = call_mutation(api_url, LOGOUT_MUTATION, variables=variables, token=token)
+    return data["logout"]["success"]
+
+
+async def async_logout(api_url, *, token=None):
+    variables = {"input": {}}
+    data = await async_call_mutation(
+        api_url, LOGOUT_MUTATION, variables=variables, token=token
+    )
     return data["logout"]["success"]
 
 
@@ -41,17 +97,8 @@ def _date_to_iso_noon(date):
     return f"{date.isoformat()}T12:00:00Z"
 
 
-def create_report(api_url, report, *, token=None):
-    mutation = """
-    mutation createReport ($input: CreateReportInput!) {
-        createReport (input: $input) {
-            report {
-                id
-            }
-        }
-    }
-    """
-    input = {
+def _report_input(report):
+    return {
         "title": report["title"],
         "body": report["body"],
         "receivedBenefit": report["received_benefit"],
@@ -61,14 +108,50 @@ def create_report(api_url, report, *, token=None):
         "otherParticipants": report["other_participants"],
         "isDraft": report["is_draft"],
     }
-    variables = {"input": input}
-    data = call_mutation(api_url, mutation, variables=variables, token=token)
+
+
+CREATE_REPORT_MUTATION = register(
+    "createReport",
+    """
+    mutation createReport ($input: CreateReportInput!) {
+        createReport (input: $input) {
+            report {
+                id
+            }
+        }
+    }
+    """,
+)
+
+
+def _create_report_variables(report):
+    return {"input": _report_input(report)}
+
+
+def _create_report_result(data):
     type, id = decode_global_id(data["createReport"]["report"]["id"])
     return id
 
 
-def update_report(api_url, report, *, token=None):
-    mutation = """
+def create_report(api_url, report, *, token=None):
+    variables = _create_report_variables(report)
+    data = call_mutation(
+        api_url, CREATE_REPORT_MUTATION, variables=variables, token=token
+    )
+    return _create_report_result(data)
+
+
+async def async_create_report(api_url, report, *, token=None):
+    variables = _create_report_variables(report)
+    data = await async_call_mutation(
+        api_url, CREATE_REPORT_MUTATION, variables=variables, token=token
+    )
+    return _create_report_result(data)
+
+
+UPDATE_REPORT_MUTATION = register(
+    "updateReport",
+    """
     mutation updateReport ($input: UpdateReportInput!) {
         updateReport (input: $input) {
             report {
@@ -76,19 +159,33 @@ def update_report(api_url, report, *, token=None):
             }
         }
     }
-    """
-    input = {
-        "id": encode_global_id("Report", report["id"]),
-        "title": report["title"],
-        "body": report["body"],
-        "receivedBenefit": report["received_benefit"],
-        "providedBenefit": report["provided_benefit"],
-        "date": _date_to_iso_noon(report["date"]),
-        "ourParticipants": report["our_participants"],
-        "otherParticipants": report["other_participants"],
-        "isDraft": report["is_draft"],
-    }
-    variables = {"input": input}
-    data = call_mutation(api_url, mutation, variables=variables, token=token)
+    """,
+)
+
+
+def _update_report_variables(report):
+    input = _report_input(report)
+    input["id"] = encode_global_id("Report", report["id"])
+    return {"input": input}
+
+
+def _update_report_result(data):
     type, id = decode_global_id(data["updateReport"]["report"]["id"])
+    delete_report_fragments(id)
     return id
+
+
+def update_report(api_url, report, *, token=None):
+    variables = _update_report_variables(report)
+    data = call_mutation(
+        api_url, UPDATE_REPORT_MUTATION, variables=variables, token=token
+    )
+    return _update_report_result(data)
+
+
+async def async_update_report(api_url, report, *, token=None):
+    variables = _update_report_variables(report)
+    data = await async_call_mutation(
+        api_url, UPDATE_REPORT_MUTATION, variables=variables, token=token
+    )
+    return await call_with_cache(fragment_cache, _update_report_result, data)
@@ -0,0 +1,95 @@
+"""Background prefetch of results pages into response cache. Visitors usually
+page forward, so the next page is fetched while they read the current one.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+import logging
+import os
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Runs prefetches in small pool of threads. Prefetch is skipped (never
+    queued) when worker process serves more than max_requests requests at
+    once (counted by PrefetchMiddleware), all threads are busy or the same
+    prefetch is running, so it doesn't compete with requests of busy worker.
+    """
+
+    def __init__(self, max_workers, max_requests=1):
+        self.max_workers = max_workers
+        self.max_requests = max_requests
+        self.requests = 0
+        self.submitted = 0
+        self.skipped = 0
+        self._executor = None
+        self._executor_pid = None
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def get_executor(self):
+        # threads don't survive fork, create pool in each worker process
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="prefetch"
+            )
+            self._executor_pid = pid
+            self._running = set()
+        return self._executor
+
+    def start_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def end_request(self):
+        with self._lock:
+            self.requests -= 1
+
+    def is_busy(self, key):
+        return (
+            self.requests > self.max_requests
+            or key in self._running
+            or len(self._running) >= self.max_workers
+        )
+
+    def submit(self, key, func, *args, **kwargs):
+        """Runs func in background unless it's busy. Returns True if func was
+        submitted.
+        """
+        if self.max_workers <= 0:
+            return False
+
+        with self._lock:
+            executor = self.get_executor()
+            if self.is_busy(key):
+                self.skipped += 1
+                return False
+            self._running.add(key)
+            self.submitted += 1
+
+        def run():
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.warning("Prefetch %s failed.", key, exc_info=True)
+            finally:
+                with self._lock:
+                    self._running.discard(key)
+
+        executor.submit(run)
+        return True
+
+    def shutdown(self):
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self._executor_pid = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+prefetcher = Prefetcher(settings.PREFETCH_WORKERS, settings.PREFETCH_MAX_REQUESTS)
@@ -2,13 +2,16 @@ from enum import Enum
 
 from .graphql import (
     NotFoundError,
+    async_call_query,
     call_query,
     encode_global_id,
     decode_global_id,
+    local_datetime_decoder,
     pythonize_report,
+    pythonize_report_edges,
     pythonize_author,
-    str_argument,
-    encode_arguments,
+    register_query,
+    VIEWER_QUERY,
 )
 
 
@@ -36,7 +39,7 @@ extra
 """
 
 revisions_snippet = f"""
-revisions {{
+revisions @include(if: $withRevisions) {{
     {report_fields}
 }}
 """
@@ -54,27 +57,12 @@ class ReportsSort(Enum):
     DATE = "date"
 
 
-def search_reports(api_url, params, *, token=None):
-    arguments = {
-        "query": str_argument(params["query"]),
-        "first": params["first"],
-        "highlight": "true",
-    }
-
-    if "after" in params:
-        arguments["after"] = str_argument(params["after"])
-
-    if params["sort"] == ReportsSort.RELEVANCE:
-        arguments["sort"] = "RELEVANCE"
-    elif params["sort"] == ReportsSort.DATE:
-        arguments["sort"] = "DATE"
-    else:
-        arguments["sort"] = "PUBLISHED"
-
-    arguments = encode_arguments(arguments)
-
-    query = f"""
-    searchReports ({arguments}) {{
+SEARCH_REPORTS_QUERY = register_query(
+    "searchReports",
+    f"""
+    searchReports (
+        query: $query, highlight: true, sort: $sort, first: $first, after: $after
+    ) {{
         totalCount
         edges {{
             node {{
@@ -85,33 +73,87 @@ def search_reports(api_url, params, *, token=None):
             }}
         }}
     }}
-    """
-    data, viewer = call_query(api_url, query, token=token)
-    search = data["searchReports"]
+    """,
+    variables="$query: String, $sort: ReportSortEnum, $first: Int, $after: String",
+)
 
-    for edge in search["edges"]:
-        edge["node"] = pythonize_report(edge["node"])
 
-    return search, viewer
+def _search_reports_variables(params):
+    variables = {"query": params["query"], "first": params["first"]}
 
+    if "after" in params:
+        variables["after"] = params["after"]
 
-def get_report(api_url, id, *, token=None, with_revisions=False):
-    global_id = encode_global_id("Report", id)
-    revisions = revisions_snippet if with_revisions else ""
-    query = f"""
-    node (id:"{global_id}") {{
+    if params["sort"] == ReportsSort.RELEVANCE:
+        variables["sort"] = "RELEVANCE"
+    elif params["sort"] == ReportsSort.DATE:
+        variables["sort"] = "DATE"
+    else:
+        variables["sort"] = "PUBLISHED"
+
+    return variables
+
+
+def _search_reports_result(data):
+    search = data["searchReports"]
+    pythonize_report_edges(search["edges"])
+    return search
+
+
+def search_reports(api_url, params, *, token=None):
+    data, viewer = call_query(
+        api_url,
+        SEARCH_REPORTS_QUERY,
+        variables=_search_reports_variables(params),
+        token=token,
+        cache="search_reports",
+    )
+    return _search_reports_result(data), viewer
+
+
+async def async_search_reports(api_url, params, *, token=None):
+    data, viewer = await async_call_query(
+        api_url,
+        SEARCH_REPORTS_QUERY,
+        variables=_search_reports_variables(params),
+        token=token,
+        cache="search_reports",
+    )
+    return _search_reports_result(data), viewer
+
+
+def batch_search_reports(batch, params):
+    return batch.query(
+        SEARCH_REPORTS_QUERY,
+        variables=_search_reports_variables(params),
+        cache="search_reports",
+        result=_search_reports_result,
+    )
+
+
+REPORT_QUERY = register_query(
+    "report",
+    f"""
+    node (id: $id) {{
         ... on Report {{
             {report_fields}
             isDraft
             author {{
                 {author_fields}
             }}
-            {revisions}
+            {revisions_snippet}
         }}
     }}
-    """
-    data, viewer = call_query(api_url, query, token=token)
+    """,
+    variables="$id: ID!, $withRevisions: Boolean!",
+)
+
+
+def _get_report_variables(id, with_revisions):
+    return {"id": encode_global_id("Report", id), "withRevisions": with_revisions}
+
 
+def _get_report_result(data):
     report = data["node"]
     if report is None:
         raise NotFoundError()
@@ -123,23 +165,47 @@ def get_report(api_url, id, *, token=None, with_revisions=False):
         for revision in report["revisions"]:
             revision["author"] = report["author"]
 
-    return report, viewer
+    return report
 
 
-def get_author_with_reports(api_url, id, params, *, token=None):
-    arguments = {"first": params["first"]}
-
-    if "after" in params:
-        arguments["after"] = str_argument(params["after"])
-
-    arguments = encode_arguments(arguments)
-
-    global_id = encode_global_id("Author", id)
-    query = f"""
-    node (id:"{global_id}") {{
+def get_report(api_url, id, *, token=None, with_revisions=False):
+    data, viewer = call_query(
+        api_url,
+        REPORT_QUERY,
+        variables=_get_report_variables(id, with_revisions),
+        token=token,
+        cache="get_report",
+    )
+    return _get_report_result(data), viewer
+
+
+async def async_get_report(api_url, id, *, token=None, with_revisions=False):
+    data, viewer = await async_call_query(
+        api_url,
+        REPORT_QUERY,
+        variables=_get_report_variables(id, with_revisions),
+        token=token,
+        cache="get_report",
+    )
+    return _get_report_result(data), viewer
+
+
+def batch_get_report(batch, id, *, with_revisions=False):
+    return batch.query(
+        REPORT_QUERY,
+        variables=_get_report_variables(id, with_revisions),
+        cache="get_report",
+        result=_get_report_result,
+    )
+
+
+AUTHOR_WITH_REPORTS_QUERY = register_query(
+    "authorWithReports",
+    f"""
+    node (id: $id) {{
         ... on Author {{
             {author_fields}
-            reports ({arguments}) {{
+            reports (first: $first, after: $after) {{
                 totalCount
                 edges {{
                     node {{
@@ -149,17 +215,29 @@ def get_author_with_reports(api_url, id, params, *, token=None):
             }}
         }}
     }}
-    """
-    data, viewer = call_query(api_url, query, token=token)
+    """,
+    variables="$id: ID!, $first: Int, $after: String",
+)
+
+
+def _get_author_with_reports_variables(id, params):
+    variables = {"id": encode_global_id("Author", id), "first": params["first"]}
+
+    if "after" in params:
+        variables["after"] = params["after"]
 
+    return variables
+
+
+def _get_author_with_reports_result(data):
     author = data["node"]
     if author is None:
         raise NotFoundError()
 
     author = pythonize_author(author)
+    pythonize_report_edges(author["reports"]["edges"])
 
     for edge in author["reports"]["edges"]:
-        edge["node"] = pythonize_report(edge["node"])
         # extend report with author info
         edge["node"]["author"] = {
             "id": author["id"],
@@ -169,47 +247,91 @@ def get_author_with_reports(api_url, id, params, *, token=None):
             "extra": author["extra"],
         }
 
-    return author, viewer
+    return author
+
+
+def get_author_with_reports(api_url, id, params, *, token=None):
+    data, viewer = call_query(
+        api_url,
+        AUTHOR_WITH_REPORTS_QUERY,
+        variables=_get_author_with_reports_variables(id, params),
+        token=token,
+        cache="get_author_with_reports",
+    )
+    return _get_author_with_reports_result(data), viewer
+
+
+async def async_get_author_with_reports(api_url, id, params, *, token=None):
+    data, viewer = await async_call_query(
+        api_url,
+        AUTHOR_WITH_REPORTS_QUERY,
+        variables=_get_author_with_reports_variables(id, params),
+        token=token,
+        cache="get_author_with_reports",
+    )
+    return _get_author_with_reports_result(data), viewer
+
+
+def batch_get_author_with_reports(batch, id, params):
+    return batch.query(
+        AUTHOR_WITH_REPORTS_QUERY,
+        variables=_get_author_with_reports_variables(id, params),
+        cache="get_author_with_reports",
+        result=_get_author_with_reports_result,
+    )
 
 
 def get_viewer(api_url, *, token=None):
-    data, viewer = call_query(api_url, "", token=token)
+    data, viewer = call_query(api_url, VIEWER_QUERY, token=token)
     return viewer
 
 
-def get_login_shortcuts(api_url, *, token=None):
-    query = """
+async def async_get_viewer(api_url, *, token=None):
+    data, viewer = await async_call_query(api_url, VIEWER_QUERY, token=token)
+    return viewer
+
+
+def batch_get_viewer(batch):
+    return batch.query(VIEWER_QUERY)
+
+
+LOGIN_SHORTCUTS_QUERY = register_query(
+    "loginShortcuts",
+    """
     loginShortcuts {
         id
         name
     }
-    """
-    data, viewer = call_query(api_url, query, token=token)
+    """,
+)
+
+
+def _get_login_shortcuts_result(data):
     shortcuts = data["loginShortcuts"]
     for shortcut in shortcuts:
         type, id = decode_global_id(shortcut["id"])
         shortcut["id"] = id
-    return shortcuts, viewer
+    return shortcuts
 
 
-def get_authors(api_url, params, *, token=None):
-    arguments = {"first": params["first"]}
+def get_login_shortcuts(api_url, *, token=None):
+    data, viewer = call_query(api_url, LOGIN_SHORTCUTS_QUERY, token=token)
+    return _get_login_shortcuts_result(data), viewer
 
-    if "after" in params:
-        arguments["after"] = str_argument(params["after"])
 
-    if params["sort"] == AuthorsSort.LAST_NAME_REVERSED:
-        arguments["sort"] = "LAST_NAME"
-        arguments["reversed"] = "true"
-    elif params["sort"] == AuthorsSort.TOTAL_REPORTS:
-        arguments["sort"] = "TOTAL_REPORTS"
-    else:
-        arguments["sort"] = "LAST_NAME"
+async def async_get_login_shortcuts(api_url, *, token=None):
+    data, viewer = await async_call_query(api_url, LOGIN_SHORTCUTS_QUERY, token=token)
+    return _get_login_shortcuts_result(data), viewer
+
 
-    arguments = encode_arguments(arguments)
+def batch_get_login_shortcuts(batch):
+    return batch.query(LOGIN_SHORTCUTS_QUERY, result=_get_login_shortcuts_result)
 
-    query = f"""
-    authors ({arguments}) {{
+
+AUTHORS_QUERY = register_query(
+    "authors",
+    f"""
+    authors (sort: $sort, reversed: $reversed, first: $first, after: $after) {{
         totalCount
         edges {{
             node {{
@@ -218,27 +340,100 @@ def get_authors(api_url, params, *, token=None):
             }}
         }}
     }}
-    """
-    data, viewer = call_query(api_url, query, token=token)
+    """,
+    variables=(
+        "$sort: AuthorSortEnum, $reversed: Boolean, $first: Int, $after: String"
+    ),
+)
+
+
+def _get_authors_variables(params):
+    variables = {"first": params["first"], "reversed": False}
+
+    if "after" in params:
+        variables["after"] = params["after"]
+
+    if params["sort"] == AuthorsSort.LAST_NAME_REVERSED:
+        variables["sort"] = "LAST_NAME"
+        variables["reversed"] = True
+    elif params["sort"] == AuthorsSort.TOTAL_REPORTS:
+        variables["sort"] = "TOTAL_REPORTS"
+    else:
+        variables["sort"] = "LAST_NAME"
+
+    return variables
+
+
+def _get_authors_result(data):
     authors = data["authors"]
 
     for edge in authors["edges"]:
         edge["node"] = pythonize_author(edge["node"])
 
-    return authors, viewer
+    return authors
 
 
-def get_report_drafts(api_url, *, token=None):
-    query = """
+def get_authors(api_url, params, *, token=None):
+    data, viewer = call_query(
+        api_url,
+        AUTHORS_QUERY,
+        variables=_get_authors_variables(params),
+        token=token,
+        cache="get_authors",
+    )
+    return _get_authors_result(data), viewer
+
+
+async def async_get_authors(api_url, params, *, token=None):
+    data, viewer = await async_call_query(
+        api_url,
+        AUTHORS_QUERY,
+        variables=_get_authors_variables(params),
+        token=token,
+        cache="get_authors",
+    )
+    return _get_authors_result(data), viewer
+
+
+def batch_get_authors(batch, params):
+    return batch.query(
+        AUTHORS_QUERY,
+        variables=_get_authors_variables(params),
+        cache="get_authors",
+        result=_get_authors_result,
+    )
+
+
+REPORT_DRAFTS_QUERY = register_query(
+    "reportDrafts",
+    """
     reportDrafts {
         id
         date
         title
         body
     }
-    """
-    data, viewer = call_query(api_url, query, token=token)
-    drafts = data["reportDrafts"]
-    for draft in drafts:
-        draft = pythonize_report(draft)
-    return drafts, viewer
+    """,
+)
+
+
+def _get_report_drafts_result(data):
+    decode_datetime = local_datetime_decoder()
+    return [
+        pythonize_report(draft, decode_datetime=decode_datetime)
+        for draft in data["reportDrafts"]
+    ]
+
+
+def get_report_drafts(api_url, *, token=None):
+    data, viewer = call_query(api_url, REPORT_DRAFTS_QUERY, token=token)
+    return _get_report_drafts_result(data), viewer
+
+
+async def async_get_report_drafts(api_url, *, token=None):
+    data, viewer = await async_call_query(api_url, REPORT_DRAFTS_QUERY, token=token)
+    return _get_report_drafts_result(data), viewer
+
+
+def batch_get_report_drafts(batch):
+    return batch.query(REPORT_DRAFTS_QUERY, result=_get_report_drafts_result)
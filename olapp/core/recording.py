@@ -0,0 +1,106 @@
+"""Recording of traffic to Open Lobby Server for load tests. Each request is
+written as JSON line with operation name, variables and response to gzipped
+file, which can be served back by benchmarks.replay.
+"""
+
+from django.conf import settings
+import gzip
+import json
+import os
+import threading
+
+
+# records written together as one gzip member
+BATCH_SIZE = 100
+
+
+class Recorder:
+    """Appends records to gzipped JSON lines file. Placeholder {pid} in path
+    is replaced by process id, so each worker process writes its own file.
+
+    Records are buffered and written in batches, each one as a complete gzip
+    member (the file is their concatenation). Killed process loses just its
+    buffer, not the whole file. Call close() at exit to write the rest.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lines = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get_path(self):
+        return self.path.replace("{pid}", str(os.getpid()))
+
+    def record(self, payload, headers, status_code, content):
+        """Records request to API, payload can be a batch. Failed requests
+        are not recorded.
+        """
+        if status_code != 200:
+            return
+        try:
+            response = json.loads(content)
+        except ValueError:
+            return
+
+        if isinstance(payload, list):
+            exchanges = zip(payload, response)
+        else:
+            exchanges = [(payload, response)]
+
+        lines = []
+        for item, item_response in exchanges:
+            if "errors" in item_response:
+                continue
+            record = {
+                "operationName": item.get("operationName"),
+                "variables": item.get("variables"),
+                "authorized": "Authorization" in headers,
+                "response": item_response,
+            }
+            lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+
+        with self._lock:
+            pid = os.getpid()
+            if self._pid != pid:
+                # buffer inherited from parent process is written by parent
+                self._lines = []
+                self._pid = pid
+            self._lines.extend(lines)
+            if len(self._lines) >= self.batch_size:
+                self._write()
+
+    def _write(self):
+        if not self._lines:
+            return
+        member = gzip.compress("".join(self._lines).encode("utf-8"))
+        # one write of appended file, so concurrent writers don't mix members
+        with open(self.get_path(), "ab") as file:
+            file.write(member)
+        self._lines = []
+
+    def close(self):
+        """Writes buffered records."""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._write()
+            self._lines = []
+
+
+def read_records(path):
+    """Yields records from recorded file. Truncated end of file (process was
+    killed while writing) is skipped.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        try:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            return
+
+
+recorder = None
+if settings.OPENLOBBY_API_RECORD:
+    recorder = Recorder(settings.OPENLOBBY_API_RECORD)
@@ -1,11 +1,41 @@
-import bleach
 import re
+import threading
+
+
+# characters changed by bleach (tags, entities and control characters), text
+# without them is returned as it is
+MARKUP_RE = re.compile(r"[\x00-\x08\x0b-\x1f&<>]")
+WORD_RE = re.compile(r"(\b\w+)")
+
+# cleaner keeps its parser, it can't be shared by threads
+_local = threading.local()
+
+
+def get_cleaner():
+    cleaner = getattr(_local, "cleaner", None)
+    if cleaner is None:
+        # bleach is imported lazily, input rarely contains markup
+        from bleach.sanitizer import Cleaner
+
+        cleaner = _local.cleaner = Cleaner(tags=[], strip=True)
+    return cleaner
 
 
 def strip_all_tags(value):
-    return bleach.clean(value, tags=[], strip=True)
+    if MARKUP_RE.search(value) is None:
+        return value
+    return get_cleaner().clean(value)
+
+
+def strip_all_tags_fields(data, fields):
+    """Strips all tags of fields in data (e.g. form cleaned data) in place."""
+    for field in fields:
+        value = data.get(field)
+        if value:
+            data[field] = strip_all_tags(value)
+    return data
 
 
 def extract_text(value):
     value = strip_all_tags(value)
-    return " ".join(re.findall(r"(\b\w+)", value))
+    return " ".join(WORD_RE.findall(value))
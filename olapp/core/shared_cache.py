@@ -0,0 +1,269 @@
+"""Cache of bytes shared by worker processes of host, stored in SQLite
+database in WAL mode (readers don't block writer). It has the same interface
+as ResponseCache, so it replaces it for query and fragment caches when
+SHARED_CACHE_PATH is set, and workers don't keep duplicate entries.
+
+Caches of different names share one database file, each is bounded by total
+size of its values. When it's full, entries expiring soonest are evicted.
+"""
+
+from contextlib import contextmanager
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    cache TEXT NOT NULL,
+    key TEXT NOT NULL,
+    expires REAL NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (cache, key)
+);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (cache, expires);
+CREATE TABLE IF NOT EXISTS sizes (
+    cache TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    INSERT OR IGNORE INTO sizes VALUES (new.cache, 0);
+    UPDATE sizes SET size = size + length(new.value) WHERE cache = new.cache;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE sizes SET size = size - length(old.value) WHERE cache = old.cache;
+END;
+"""
+
+# greater than any character of key, upper bound of keys with prefix
+MAX_CHAR = "\U0010ffff"
+
+# connections inherited from parent process, closing them could break its
+# locks, so they are just kept
+_inherited_connections = []
+
+
+class ConnectionPool:
+    """Connections to database reused by threads (or greenlets) of process.
+    Each connection is used by one of them at a time. Schema is created by the
+    first connection of process.
+    """
+
+    def __init__(self, path, timeout, size):
+        self.path = path
+        self.timeout = timeout
+        # max. idle connections kept open
+        self.size = size
+        self.pid = os.getpid()
+        self._idle = []
+        self._schema_created = False
+        self._lock = threading.Lock()
+
+    def connect(self):
+        # autocommit, transactions are explicit
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_created:
+            # WAL mode is persistent, it's set with schema
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._schema_created = True
+        return connection
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self.connect()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def release(self, connection):
+        with self._lock:
+            # connection left in transaction by failed rollback isn't reused
+            if len(self._idle) < self.size and not connection.in_transaction:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """Closes idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, timeout, size):
+    """Returns connection pool of database for current process."""
+    pid = os.getpid()
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None or pool.pid != pid:
+            if pool is not None:
+                _inherited_connections.extend(pool._idle)
+            pool = _pools[path] = ConnectionPool(path, timeout, size)
+        return pool
+
+
+class SharedCache:
+    """SQLite cache of bytes with TTL. Connections are reused from pool of
+    process, shared by caches of the same database. Errors of database are
+    logged and cache behaves as empty.
+    """
+
+    # calls wait for database, async code runs them in thread (see
+    # call_with_cache)
+    shared = True
+    # how long (in seconds) to wait for lock of database
+    timeout = 1.0
+    # max. idle connections of process
+    pool_size = 8
+
+    def __init__(self, path, name, max_size):
+        self.path = path
+        self.name = name
+        self.max_size = max_size
+        # statistics of this process
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def __len__(self):
+        return self.stats()["entries"]
+
+    def connection(self):
+        return get_pool(self.path, self.timeout, self.pool_size).connection()
+
+    def close(self):
+        """Closes idle connections of process."""
+        get_pool(self.path, self.timeout, self.pool_size).close()
+
+    def count(self, stat, value=1):
+        with self._stats_lock:
+            setattr(self, stat, getattr(self, stat) + value)
+
+    def log_error(self, operation, error):
+        logger.warning("Shared cache %s failed to %s: %s", self.name, operation, error)
+
+    def get(self, key):
+        try:
+            with self.connection() as connection:
+                row = connection.execute(
+                    "SELECT expires, value FROM entries WHERE cache = ? AND key = ?",
+                    (self.name, key),
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.log_error("get", e)
+            row = None
+        # expired entry is left for eviction, reads don't write
+        if row is None or row[0] <= time.time():
+            self.count("misses")
+            return None
+        self.count("hits")
+        return row[1]
+
+    def set(self, key, value, ttl):
+        if ttl <= 0 or len(value) > self.max_size:
+            return
+        try:
+            with self.connection() as connection:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self._set(connection, key, value, ttl)
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+                connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            self.log_error("set", e)
+
+    def _set(self, connection, key, value, ttl):
+        now = time.time()
+        connection.execute(
+            "DELETE FROM entries WHERE cache = ? AND key = ?", (self.name, key)
+        )
+        connection.execute(
+            "INSERT INTO entries VALUES (?, ?, ?, ?)",
+            (self.name, key, now + ttl, value),
+        )
+        excess = self._get_size(connection) - self.max_size
+        if excess <= 0:
+            return
+
+        # expired entries are first
+        rows = connection.execute(
+            "SELECT key, length(value) FROM entries WHERE cache = ? "
+            "ORDER BY expires",
+            (self.name,),
+        )
+        keys = []
+        for old_key, size in rows:
+            keys.append((self.name, old_key))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE cache = ? AND key = ?", keys)
+        self.count("evictions", len(keys))
+
+    def _get_size(self, connection):
+        row = connection.execute(
+            "SELECT size FROM sizes WHERE cache = ?", (self.name,)
+        ).fetchone()
+        return row[0] if row is not None else 0
+
+    def delete(self, key):
+        self._execute("delete", "DELETE FROM entries WHERE cache = ? AND key = ?", key)
+
+    def delete_prefix(self, prefix):
+        """Deletes all keys starting with prefix."""
+        self._execute(
+            "delete",
+            "DELETE FROM entries WHERE cache = ? AND key >= ? AND key < ?",
+            prefix,
+            prefix + MAX_CHAR,
+        )
+
+    def clear(self):
+        self._execute("clear", "DELETE FROM entries WHERE cache = ?")
+
+    def _execute(self, operation, sql, *params):
+        try:
+            with self.connection() as connection:
+                connection.execute(sql, (self.name,) + params)
+        except sqlite3.Error as e:
+            self.log_error(operation, e)
+
+    def stats(self):
+        try:
+            with self.connection() as connection:
+                entries = connection.execute(
+                    "SELECT COUNT(*) FROM entries WHERE cache = ?", (self.name,)
+                ).fetchone()[0]
+                size = self._get_size(connection)
+        except sqlite3.Error as e:
+            self.log_error("get stats", e)
+            entries = size = 0
+        return {
+            "entries": entries,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
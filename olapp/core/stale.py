@@ -0,0 +1,67 @@
+"""Last known good responses of public pages for anonymous visitors. They are
+served (marked as stale) when Open Lobby Server is unavailable.
+"""
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+import copy
+import math
+import time
+
+from .cache import ResponseCache
+from .prefetch import Prefetcher
+
+
+STALE_WARNING = '110 - "Response is Stale"'
+
+stale_cache = ResponseCache(settings.STALE_CACHE_SIZE)
+
+# refreshes stale responses in background
+refresher = Prefetcher(settings.STALE_REFRESH_WORKERS)
+
+
+def is_stale_if_error(request):
+    """Checks if response to request can be kept and served stale. Only
+    anonymous GET requests of views with stale_if_error attribute.
+    """
+    if request.method != "GET" or settings.ACCESS_TOKEN_COOKIE in request.COOKIES:
+        return False
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return False
+    view_class = getattr(match.func, "view_class", None)
+    return getattr(view_class, "stale_if_error", False)
+
+
+def get_stale_key(request):
+    return request.get_full_path()
+
+
+def store_response(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+    header = f"{time.time()}\n{response['Content-Type']}\n".encode("utf-8")
+    content = header + response.content
+    stale_cache.set(get_stale_key(request), content, settings.STALE_CACHE_TTL)
+
+
+def get_stale_response(request):
+    content = stale_cache.get(get_stale_key(request))
+    if content is None:
+        return None
+    stored, content_type, body = content.split(b"\n", 2)
+    response = HttpResponse(body, content_type=content_type.decode("utf-8"))
+    response["Age"] = max(math.floor(time.time() - float(stored)), 0)
+    response["Warning"] = STALE_WARNING
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+def refresh_response(request, get_response):
+    """Renders fresh response to request in background. The request is marked
+    as refresh, so it's not served stale again.
+    """
+    request = copy.copy(request)
+    request.stale_refresh = True
+    refresher.submit(get_stale_key(request), get_response, request)
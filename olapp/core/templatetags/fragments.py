@@ -0,0 +1,19 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..fragments import render_report_snippet
+
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def report_snippet(context, report, is_revision=False):
+    """Renders report snippet, it's cached (see olapp.core.fragments)."""
+    html = render_report_snippet(
+        report,
+        viewer=context.get("viewer"),
+        highlight=context.get("highlight", ""),
+        is_revision=is_revision,
+    )
+    return mark_safe(html)
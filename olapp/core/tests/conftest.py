@@ -0,0 +1,145 @@
+from django.core.handlers.asgi import ASGIHandler
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import httpx
+import importlib.util
+import json
+import pytest
+import threading
+
+from ..cache import response_cache
+from ..circuit import circuit_breaker
+from ..client import close_session
+from ..graphql import encode_global_id
+from ..metrics import registry
+from ..prefetch import prefetcher
+from ..stale import refresher, stale_cache
+from olapp import urls
+
+
+REPORT = {
+    "id": encode_global_id("Report", "1"),
+    "date": "2018-01-01T12:00:00+00:00",
+    "published": "2018-01-02T10:00:00+00:00",
+    "edited": "2018-01-03T10:00:00+00:00",
+    "title": "Title",
+    "body": "Body",
+    "receivedBenefit": "",
+    "providedBenefit": "",
+    "ourParticipants": "",
+    "otherParticipants": "",
+    "extra": None,
+    "hasRevisions": False,
+    "author": {
+        "id": encode_global_id("Author", "2"),
+        "firstName": "Jan",
+        "lastName": "Novák",
+        "hasCollidingName": False,
+        "extra": None,
+    },
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        content = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(content)
+        self.server.headers.append(self.headers)
+        status, response = self.server.respond(json.loads(content))
+
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_server():
+    """Local stub of Open Lobby Server. Set its respond(payload) function
+    returning status code and response. Raw requests are in its requests
+    and their headers in headers.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    server.headers = []
+    server.respond = lambda payload: (200, {"data": {}})
+    server.url = f"http://127.0.0.1:{server.server_port}/graphql"
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    close_session()
+
+
+@pytest.fixture
+def api(api_server, settings, request):
+    """Open Lobby Server stub used by application. It responds with data
+    {"node": REPORT} to any query, other data can be given by indirect
+    parametrization. Caches, metrics and background threads are reset around
+    the test.
+    """
+    data = getattr(request, "param", {"node": REPORT})
+    settings.OPENLOBBY_API_URL = api_server.url
+    api_server.respond = lambda payload: (200, {"data": data})
+    response_cache.clear()
+    stale_cache.clear()
+    registry.clear()
+    yield api_server
+    prefetcher.shutdown()
+    refresher.shutdown()
+    response_cache.clear()
+    stale_cache.clear()
+    registry.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker():
+    circuit_breaker.reset()
+    yield
+    circuit_breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def static_storage(settings):
+    """Static files aren't collected for tests, so they have no hashed names."""
+    settings.STATICFILES_STORAGE = (
+        "django.contrib.staticfiles.storage.StaticFilesStorage"
+    )
+
+
+@pytest.fixture
+def asgi_get():
+    """Function which sends GET requests to paths concurrently to ASGI
+    application (with current settings) and returns responses.
+    """
+
+    def get(*paths, headers=None):
+        async def run():
+            transport = httpx.ASGITransport(app=ASGIHandler())
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://testserver"
+            ) as client:
+                requests = [client.get(path, headers=headers) for path in paths]
+                return await asyncio.gather(*requests)
+
+        return asyncio.run(run())
+
+    return get
+
+
+@pytest.fixture
+def async_views(settings):
+    """Loads URLconf with asynchronous views (urls module picks them at import)."""
+    settings.ASYNC_VIEWS = True
+    spec = importlib.util.spec_from_file_location("async_urls", urls.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    settings.ROOT_URLCONF = module
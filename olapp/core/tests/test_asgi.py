@@ -0,0 +1,48 @@
+import threading
+import time
+
+from ..cache import response_cache
+from ..stale import STALE_WARNING, refresher, stale_cache
+from .conftest import REPORT
+
+
+LATENCY = 0.2
+CONCURRENCY = 8
+
+
+def test_asgi__concurrent_requests(api, async_views, asgi_get):
+    # count of requests being answered by server at once
+    active = peak = 0
+    lock = threading.Lock()
+
+    def respond(payload):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(LATENCY)
+        with lock:
+            active -= 1
+        return 200, {"data": {"node": REPORT}}
+
+    api.respond = respond
+    paths = [f"/report/{i}/" for i in range(CONCURRENCY)]
+    responses = asgi_get(*paths)
+
+    assert [response.status_code for response in responses] == [200] * CONCURRENCY
+    # requests wait for server together, not one by one
+    assert peak > 1
+
+
+def test_asgi__stale_if_error__refresh(api, async_views, asgi_get):
+    asgi_get("/report/1/")
+    response_cache.clear()
+
+    changed = dict(REPORT, title="Changed title", edited="2018-02-01T10:00:00+00:00")
+    responses = [(503, {}), (200, {"data": {"node": changed}})]
+    api.respond = lambda payload: responses.pop(0)
+
+    [response] = asgi_get("/report/1/")
+    assert response.headers["Warning"] == STALE_WARNING
+    refresher.shutdown()
+    assert b"Changed title" in stale_cache.get("/report/1/")
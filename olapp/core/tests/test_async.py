@@ -0,0 +1,90 @@
+import asyncio
+import httpx
+import json
+import pytest
+import threading
+
+from .. import graphql
+from ..cache import ResponseCache
+from ..documents import Document
+
+
+FOO_QUERY = Document("foo", "query foo { foo }")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    responses = []
+
+    def handler(request):
+        return responses.pop(0)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(graphql, "get_async_client", lambda: client)
+    return responses
+
+
+def test_async_call_api(api):
+    api.append(httpx.Response(200, json={"data": {"foo": "bar"}}))
+    data = asyncio.run(graphql.async_call_api("http://api", FOO_QUERY))
+    assert data == {"foo": "bar"}
+
+
+class SharedCache(ResponseCache):
+    """Cache which records threads calling it."""
+
+    shared = True
+
+    def __init__(self):
+        super().__init__(1024)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl):
+        self.threads.add(threading.get_ident())
+        super().set(key, value, ttl)
+
+
+def test_async_call_api__shared_cache_outside_event_loop(api, monkeypatch, settings):
+    cache = SharedCache()
+    monkeypatch.setattr(graphql, "response_cache", cache)
+    settings.QUERY_CACHE_TTL = {"foo": 10}
+    api.append(httpx.Response(200, json={"data": {"foo": "bar"}}))
+
+    async def run():
+        for i in range(2):
+            data = await graphql.async_call_api("http://api", FOO_QUERY, cache="foo")
+            assert data == {"foo": "bar"}
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert cache.threads
+    assert loop_thread not in cache.threads
+
+
+def test_async_call_api__invalid_token(api):
+    api.append(httpx.Response(401))
+    with pytest.raises(graphql.InvalidTokenError):
+        asyncio.run(graphql.async_call_api("http://api", FOO_QUERY, token="x"))
+
+
+def test_async_call_api__errors(api):
+    errors = [{"message": "foo"}]
+    api.append(httpx.Response(200, content=json.dumps({"errors": errors})))
+    with pytest.raises(graphql.GraphQLError):
+        asyncio.run(graphql.async_call_api("http://api", FOO_QUERY))
+
+
+def test_async_call_query__uses_viewer(api):
+    viewer = {
+        "id": "VXNlcjpBQkMxMjM=",
+        "firstName": "Foo",
+        "lastName": "Bar",
+        "extra": None,
+    }
+    api.append(httpx.Response(200, json={"data": {"viewer": viewer}}))
+    data, viewer = asyncio.run(graphql.async_call_query("http://api", FOO_QUERY))
+    assert viewer["id"] == "ABC123"
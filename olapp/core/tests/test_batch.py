@@ -0,0 +1,85 @@
+import json
+import pytest
+
+from .. import queries
+from ..graphql import Batch, GraphQLError, InvalidTokenError, NotFoundError
+
+
+AUTHOR = {
+    "id": "QXV0aG9yOmF1dGhvcjE=",
+    "firstName": "Foo",
+    "lastName": "Bar",
+    "hasCollidingName": False,
+    "extra": None,
+    "totalReports": 3,
+}
+
+
+def respond(payload):
+    results = []
+    for operation in payload:
+        if operation["operationName"] == "report":
+            results.append({"data": {"node": None, "viewer": None}})
+        elif operation["operationName"] == "authors":
+            authors = {"totalCount": 1, "edges": [{"node": dict(AUTHOR)}]}
+            results.append({"data": {"authors": authors, "viewer": None}})
+        else:
+            results.append({"errors": [{"message": "foo"}]})
+    return 200, results
+
+
+@pytest.fixture
+def batch(api_server):
+    api_server.respond = respond
+    return Batch(api_server.url)
+
+
+def test_batch(api_server, batch):
+    params = {"first": 10, "sort": queries.AuthorsSort.LAST_NAME}
+    authors = queries.batch_get_authors(batch, params)
+    report = queries.batch_get_report(batch, "report1")
+    shortcuts = queries.batch_get_login_shortcuts(batch)
+    batch.execute()
+
+    # all operations are sent in one request
+    assert len(api_server.requests) == 1
+    payload = json.loads(api_server.requests[0])
+    names = [operation["operationName"] for operation in payload]
+    assert names == ["authors", "report", "loginShortcuts"]
+
+    authors, viewer = authors.get()
+    assert authors["edges"][0]["node"]["id"] == "author1"
+    assert viewer is None
+
+    with pytest.raises(NotFoundError):
+        report.get()
+
+    with pytest.raises(GraphQLError):
+        shortcuts.get()
+
+
+def test_batch__not_executed(batch):
+    report = queries.batch_get_report(batch, "report1")
+    with pytest.raises(RuntimeError):
+        report.get()
+
+
+def test_batch__invalid_token(api_server):
+    api_server.respond = lambda payload: (401, {})
+    batch = Batch(api_server.url, token="foo")
+    queries.batch_get_report_drafts(batch)
+    with pytest.raises(InvalidTokenError):
+        batch.execute()
+
+
+def test_batch__missing_results(api_server, batch):
+    api_server.respond = lambda payload: respond(payload[:1])
+    params = {"first": 10, "sort": queries.AuthorsSort.LAST_NAME}
+    authors = queries.batch_get_authors(batch, params)
+    report = queries.batch_get_report(batch, "report1")
+    batch.execute()
+
+    authors, viewer = authors.get()
+    assert authors["totalCount"] == 1
+    with pytest.raises(GraphQLError):
+        report.get()
@@ -0,0 +1,215 @@
+import json
+import jwt
+import pytest
+import time
+
+from .. import queries
+from ..cache import (
+    ResponseCache,
+    delete_cached_viewer,
+    get_cached_viewer,
+    get_viewer_ttl,
+    make_key,
+    normalize_query,
+    response_cache,
+    set_cached_viewer,
+    viewer_cache,
+)
+from ..graphql import InvalidTokenError
+from .conftest import REPORT
+
+
+def make_token(expires_in):
+    payload = {"sub": "foo", "exp": int(time.time() + expires_in)}
+    return jwt.encode(payload, "secret").decode("utf-8")
+
+
+def test_normalize_query():
+    query = """
+    searchReports (query: "foo  bar", first: 10) {
+        totalCount
+    }
+    """
+    expected = 'searchReports (query: "foo  bar", first: 10) { totalCount }'
+    assert normalize_query(query) == expected
+
+
+def test_make_key__ignores_order_of_variables():
+    key = make_key("http://api", "abc123", {"a": 1, "b": 2})
+    assert key == make_key("http://api", "abc123", {"b": 2, "a": 1})
+
+
+def test_make_key__differs_by_variables():
+    assert make_key("http://api", "abc123", {"a": 1}) != make_key(
+        "http://api", "abc123", {"a": 2}
+    )
+
+
+def test_response_cache__get_set():
+    cache = ResponseCache(100)
+    assert cache.get("a") is None
+    cache.set("a", b"foo", 10)
+    assert cache.get("a") == b"foo"
+    assert cache.stats() == {
+        "entries": 1,
+        "size": 3,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_response_cache__expiration():
+    cache = ResponseCache(100)
+    cache.set("a", b"foo", 0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_response_cache__evicts_least_recently_used():
+    cache = ResponseCache(10)
+    cache.set("a", b"aaaa", 10)
+    cache.set("b", b"bbbb", 10)
+    cache.get("a")
+    cache.set("c", b"cccc", 10)
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"cccc"
+    assert cache.size == 8
+    assert cache.evictions == 1
+
+
+def test_response_cache__skips_too_large_value():
+    cache = ResponseCache(2)
+    cache.set("a", b"foo", 10)
+    assert cache.get("a") is None
+
+
+def test_get_viewer_ttl(settings):
+    settings.VIEWER_CACHE_TTL = 300
+    assert get_viewer_ttl(make_token(3600)) == 300
+    assert 0 < get_viewer_ttl(make_token(100)) <= 100
+    assert get_viewer_ttl(make_token(-100)) < 0
+
+
+def test_get_viewer_ttl__invalid_token():
+    assert get_viewer_ttl("foo") == 0
+
+
+def test_cached_viewer():
+    token = make_token(3600)
+    viewer = {"id": "VXNlcjox", "firstName": "Foo", "extra": None}
+    assert get_cached_viewer(token) is None
+    set_cached_viewer(token, viewer)
+    assert get_cached_viewer(token) == viewer
+    assert get_cached_viewer(make_token(7200)) is None
+    delete_cached_viewer(token)
+    assert get_cached_viewer(token) is None
+
+
+def test_cached_viewer__not_for_expired_token():
+    token = make_token(-100)
+    set_cached_viewer(token, {"id": "VXNlcjox"})
+    assert get_cached_viewer(token) is None
+
+
+def test_response_cache__delete_prefix():
+    cache = ResponseCache(100)
+    cache.set("a:1", b"x", 10)
+    cache.set("a:2", b"y", 10)
+    cache.set("b:1", b"z", 10)
+    cache.delete_prefix("a:")
+    assert cache.get("a:1") is None
+    assert cache.get("a:2") is None
+    assert cache.get("b:1") == b"z"
+    assert cache.size == 1
+
+
+def test_response_cache__clear_resets_stats():
+    cache = ResponseCache(100)
+    cache.set("a", b"abc", 10)
+    cache.get("a")
+    cache.get("b")
+    cache.clear()
+    assert cache.stats() == {
+        "entries": 0,
+        "size": 0,
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+    }
+
+
+VIEWER = {
+    "id": "VXNlcjox",
+    "firstName": "Foo",
+    "lastName": "Bar",
+    "hasCollidingName": False,
+    "email": "foo@example.com",
+    "openidUid": "foo",
+    "isAuthor": True,
+    "extra": None,
+}
+
+
+@pytest.fixture
+def viewer_api(api):
+    api.respond = lambda payload: (200, {"data": {"node": REPORT, "viewer": VIEWER}})
+    viewer_cache.clear()
+    yield api
+    viewer_cache.clear()
+
+
+def sent_with_viewer(api):
+    return [json.loads(request)["variables"]["withViewer"] for request in api.requests]
+
+
+def test_call_query__skips_viewer_when_cached(viewer_api, settings):
+    token = make_token(3600)
+    for i in range(2):
+        report, viewer = queries.get_report(
+            settings.OPENLOBBY_API_URL, "1", token=token
+        )
+        assert viewer["id"] == "1"
+    assert sent_with_viewer(viewer_api) == [True, False]
+
+
+def test_get_viewer__cached(viewer_api, settings):
+    token = make_token(3600)
+    queries.get_report(settings.OPENLOBBY_API_URL, "1", token=token)
+    viewer = queries.get_viewer(settings.OPENLOBBY_API_URL, token=token)
+    assert viewer["firstName"] == "Foo"
+    assert len(viewer_api.requests) == 1
+
+
+def test_cached_viewer__deleted_for_invalid_token(viewer_api, settings):
+    token = make_token(3600)
+    queries.get_report(settings.OPENLOBBY_API_URL, "1", token=token)
+    assert get_cached_viewer(token) is not None
+
+    viewer_api.respond = lambda payload: (401, {})
+    with pytest.raises(InvalidTokenError):
+        queries.get_report(settings.OPENLOBBY_API_URL, "1", token=token)
+    assert get_cached_viewer(token) is None
+
+
+def test_cached_viewer__deleted_on_logout(viewer_api, client, settings):
+    token = make_token(3600)
+    queries.get_report(settings.OPENLOBBY_API_URL, "1", token=token)
+    assert get_cached_viewer(token) is not None
+
+    client.cookies[settings.ACCESS_TOKEN_COOKIE] = token
+    assert client.get("/logout/").status_code == 302
+    assert get_cached_viewer(token) is None
+
+
+def test_call_query__not_cached_with_token(api, settings):
+    token = make_token(3600)
+    for i in range(2):
+        report, viewer = queries.get_report(
+            settings.OPENLOBBY_API_URL, "1", token=token
+        )
+        assert report["title"] == "Title"
+    assert len(api.requests) == 2
+    assert len(response_cache) == 0
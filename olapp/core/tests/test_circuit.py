@@ -0,0 +1,157 @@
+import pytest
+
+from ..circuit import CircuitBreaker, circuit_breaker
+from ..documents import Document
+from ..graphql import CircuitOpenError, ServiceUnavailableError, call_api
+
+
+FOO_QUERY = Document("foo", "query foo { foo }")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("olapp.core.circuit.time.monotonic", clock)
+    return clock
+
+
+def make_breaker(**kwargs):
+    options = dict(failure_rate=0.5, min_calls=4, window=10, open_time=5, probes=2)
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def call(breaker, success):
+    permit = breaker.allow()
+    assert permit
+    breaker.record(success, permit)
+
+
+def test_circuit_breaker__opens_on_failure_rate(clock):
+    breaker = make_breaker()
+    call(breaker, True)
+    call(breaker, False)
+    call(breaker, True)
+    assert breaker.state == breaker.CLOSED
+    call(breaker, False)
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 5
+
+
+def test_circuit_breaker__needs_min_calls(clock):
+    breaker = make_breaker()
+    call(breaker, False)
+    call(breaker, False)
+    call(breaker, False)
+    assert breaker.state == breaker.CLOSED
+
+
+def test_circuit_breaker__forgets_old_calls(clock):
+    breaker = make_breaker()
+    call(breaker, False)
+    call(breaker, False)
+    clock.now += 11
+    call(breaker, True)
+    call(breaker, True)
+    call(breaker, False)
+    assert breaker.state == breaker.CLOSED
+    assert breaker.stats() == {"state": "closed", "calls": 3, "failures": 1}
+
+
+def test_circuit_breaker__probes_close_it(clock):
+    breaker = make_breaker(min_calls=1)
+    call(breaker, False)
+    clock.now += 5
+    first = breaker.allow()
+    assert first
+    assert breaker.state == breaker.HALF_OPEN
+    second = breaker.allow()
+    assert second
+    # just two probes at once
+    assert not breaker.allow()
+    breaker.record(True, first)
+    assert breaker.state == breaker.HALF_OPEN
+    breaker.record(True, second)
+    assert breaker.state == breaker.CLOSED
+    assert breaker.allow()
+
+
+def test_circuit_breaker__failed_probe_opens_it(clock):
+    breaker = make_breaker(min_calls=1)
+    call(breaker, False)
+    clock.now += 5
+    call(breaker, False)
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
+
+
+def test_circuit_breaker__late_calls_are_not_probes(clock):
+    breaker = make_breaker(min_calls=1, probes=1)
+    late = breaker.allow()
+    call(breaker, False)
+    clock.now += 5
+    probe = breaker.allow()
+    assert probe
+
+    # call allowed while circuit was closed neither closes it nor frees probe
+    breaker.record(True, late)
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True, probe)
+    assert breaker.state == breaker.CLOSED
+
+
+def test_circuit_breaker__probe_of_previous_half_open(clock):
+    breaker = make_breaker(min_calls=1, probes=2)
+    call(breaker, False)
+    clock.now += 5
+    old = breaker.allow()
+    call(breaker, False)
+    assert breaker.state == breaker.OPEN
+    clock.now += 5
+    call(breaker, True)
+
+    # success of the old probe doesn't count to probes of this half-open
+    breaker.record(True, old)
+    assert breaker.state == breaker.HALF_OPEN
+    call(breaker, True)
+    assert breaker.state == breaker.CLOSED
+
+
+def test_circuit_breaker__disabled(clock):
+    breaker = make_breaker(min_calls=0)
+    for i in range(10):
+        call(breaker, False)
+    assert breaker.state == breaker.CLOSED
+
+
+def test_call_api__fails_fast_when_open(api_server, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "min_calls", 2)
+    api_server.respond = lambda payload: (502, {})
+
+    for i in range(2):
+        with pytest.raises(ServiceUnavailableError):
+            call_api(api_server.url, FOO_QUERY)
+
+    with pytest.raises(CircuitOpenError):
+        call_api(api_server.url, FOO_QUERY)
+    assert len(api_server.requests) == 2
+
+
+def test_middleware__circuit_open(client, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "min_calls", 1)
+    circuit_breaker.record(False, circuit_breaker.allow())
+
+    response = client.get("/")
+    assert response.status_code == 503
+    assert int(response["Retry-After"]) > 0
+    assert client.get("/about/").content == response.content
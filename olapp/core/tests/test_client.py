@@ -0,0 +1,20 @@
+from ..client import close_session, get_session, get_timeout
+
+
+def test_get_session__reuses_session():
+    close_session()
+    assert get_session() is get_session()
+
+
+def test_get_session__pool_size(settings):
+    settings.OPENLOBBY_API_POOL_SIZE = 3
+    close_session()
+    adapter = get_session().get_adapter("http://localhost:8010/graphql")
+    assert adapter._pool_maxsize == 3
+    close_session()
+
+
+def test_get_timeout(settings):
+    settings.OPENLOBBY_API_CONNECT_TIMEOUT = 1.5
+    settings.OPENLOBBY_API_READ_TIMEOUT = 7
+    assert get_timeout() == (1.5, 7)
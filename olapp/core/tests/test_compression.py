@@ -0,0 +1,99 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+import asyncio
+import brotli
+import gzip
+import pytest
+
+from ..compression import choose_encoding
+from ..middleware import CompressionMiddleware
+
+
+CONTENT = b"<p>" + b"Kontakt s lobbistou. " * 100 + b"</p>"
+
+
+@pytest.mark.parametrize(
+    "header, encoding",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0, gzip;q=0.5", "gzip"),
+        ("GZIP;q=1.0", "gzip"),
+        ("*", "br"),
+        ("deflate, *;q=0", None),
+        ("*, br;q=0", "gzip"),
+        ("gzip;q=1, br;q=0.1", "gzip"),
+        ("gzip;q=0.5, br;q=0.5", "br"),
+        ("gzip;q=0.5, *;q=0.8", "br"),
+        ("br;q=0, gzip;q=0", None),
+    ],
+)
+def test_choose_encoding(header, encoding):
+    assert choose_encoding(header) == encoding
+
+
+def get(response, accept_encoding="gzip, br"):
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+def test_compression_middleware__brotli():
+    response = get(HttpResponse(CONTENT))
+    assert response["Content-Encoding"] == "br"
+    assert response["Vary"] == "Accept-Encoding"
+    assert int(response["Content-Length"]) == len(response.content)
+    assert brotli.decompress(response.content) == CONTENT
+
+
+def test_compression_middleware__gzip():
+    response = HttpResponse(CONTENT)
+    response["ETag"] = '"foo"'
+    response = get(response, "gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert response["ETag"] == 'W/"foo"'
+    assert gzip.decompress(response.content) == CONTENT
+
+
+def test_compression_middleware__not_accepted():
+    response = get(HttpResponse(CONTENT), "")
+    assert not response.has_header("Content-Encoding")
+    assert response["Vary"] == "Accept-Encoding"
+    assert response.content == CONTENT
+
+
+def test_compression_middleware__streaming():
+    response = get(StreamingHttpResponse([CONTENT, CONTENT]), "gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(b"".join(response.streaming_content)) == CONTENT * 2
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        HttpResponse(b"<p>short</p>"),
+        HttpResponse(status=304),
+        HttpResponse(CONTENT, content_type="image/png"),
+        HttpResponse(CONTENT, headers={"Content-Encoding": "br"}),
+        HttpResponse(CONTENT, headers={"Cache-Control": "no-transform"}),
+    ],
+)
+def test_compression_middleware__skipped(response):
+    content = response.content
+    response = get(response)
+    assert response.content == content
+    assert response.get("Content-Encoding") in (None, "br")
+    assert not response.has_header("Vary")
+
+
+def test_compression_middleware__async():
+    async def get_response(request):
+        return HttpResponse(CONTENT)
+
+    middleware = CompressionMiddleware(get_response)
+    assert asyncio.iscoroutinefunction(middleware)
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+    response = asyncio.run(middleware(request))
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.content) == CONTENT
@@ -0,0 +1,26 @@
+import hashlib
+import pytest
+
+from ..documents import Document, documents, register
+
+
+def test_document():
+    document = Document(
+        "foo", "query foo {\n    foo (bar: $bar) {\n        id\n    }\n}"
+    )
+    assert document.name == "foo"
+    assert document.text == "query foo { foo (bar: $bar) { id } }"
+    expected = hashlib.sha256(document.text.encode("utf-8")).hexdigest()
+    assert document.hash == expected
+
+
+def test_document__hash_ignores_formatting():
+    assert Document("foo", "{ foo }").hash == Document("foo", "{\n  foo\n}\n").hash
+
+
+def test_register():
+    document = register("testRegister", "query testRegister { foo }")
+    assert documents["testRegister"] is document
+    with pytest.raises(ValueError):
+        register("testRegister", "query testRegister { bar }")
+    del documents["testRegister"]
@@ -0,0 +1,71 @@
+import pytest
+
+from ..fragments import (
+    delete_report_fragments,
+    fragment_cache,
+    get_report_snippet_key,
+    render_report_snippet,
+)
+from ..graphql import LazyReport, LazyUser
+
+
+@pytest.fixture(autouse=True)
+def clear_fragment_cache():
+    fragment_cache.clear()
+    yield
+    fragment_cache.clear()
+
+
+def make_report(**fields):
+    data = {
+        "id": "UmVwb3J0OjE=",
+        "date": "2018-01-01T12:00:00+00:00",
+        "published": "2018-01-02T10:00:00+00:00",
+        "edited": "2018-01-02T10:00:00+00:00",
+        "title": "Title",
+        "body": "Body",
+        "receivedBenefit": "",
+        "providedBenefit": "",
+        "ourParticipants": "",
+        "otherParticipants": "",
+        "extra": None,
+        "hasRevisions": False,
+        "author": {
+            "id": "QXV0aG9yOjI=",
+            "firstName": "Jan",
+            "lastName": "Novák",
+            "hasCollidingName": False,
+            "extra": None,
+        },
+    }
+    data.update(fields)
+    return LazyReport(data)
+
+
+def test_render_report_snippet__cached():
+    html = render_report_snippet(make_report())
+    assert "Title" in html
+    assert len(fragment_cache) == 1
+    assert render_report_snippet(make_report(title="Changed")) == html
+    assert fragment_cache.hits == 1
+
+
+def test_report_snippet_key():
+    key = get_report_snippet_key(make_report())
+    assert key.startswith("report_snippet:1:")
+    assert key == get_report_snippet_key(make_report())
+    edited = make_report(edited="2018-01-03T10:00:00+00:00")
+    assert key != get_report_snippet_key(edited)
+    assert key != get_report_snippet_key(make_report(), highlight="foo")
+    assert key != get_report_snippet_key(make_report(), is_revision=True)
+    viewer = LazyUser({"id": "QXV0aG9yOjI="})
+    assert key != get_report_snippet_key(make_report(), viewer=viewer)
+    other_viewer = LazyUser({"id": "QXV0aG9yOjM="})
+    assert key == get_report_snippet_key(make_report(), viewer=other_viewer)
+
+
+def test_delete_report_fragments():
+    render_report_snippet(make_report())
+    render_report_snippet(make_report(), is_revision=True)
+    delete_report_fragments("1")
+    assert len(fragment_cache) == 0
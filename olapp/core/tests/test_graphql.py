@@ -1,9 +1,14 @@
+import arrow
+import pytest
+
 from ..graphql import (
+    LazyReport,
+    local_datetime_decoder,
+    parse_datetime,
+    pythonize_report_edges,
     decode_global_id,
     encode_global_id,
     encode_cursor,
-    encode_arguments,
-    str_argument,
 )
 
 
@@ -20,17 +25,90 @@ def test_encode_cursor():
     assert encode_cursor(42) == "NDI="
 
 
-def test_str_argument():
-    assert str_argument("foo") == '"foo"'
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2018-01-02T10:20:30+00:00",
+        "2018-01-02T10:20:30.123456+00:00",
+        "2018-01-02T10:20:30Z",
+        "2018-07-02T23:20:30+02:00",
+        "2018-01-02T10:20:30",
+        "2018-01-02T10:20:30.1234+00:00",
+        "2018-01-02",
+    ],
+)
+def test_parse_datetime(value):
+    assert parse_datetime(value) == arrow.get(value).datetime
+
+
+def test_local_datetime_decoder():
+    decode = local_datetime_decoder()
+    dt = decode("2018-12-31T23:30:00+00:00")
+    assert dt == arrow.get("2018-12-31T23:30:00+00:00").datetime
+    assert dt.date().isoformat() == "2019-01-01"
+    assert decode("2018-12-31T23:30:00+00:00") is dt
+
 
+def test_pythonize_report_edges():
+    edges = [
+        {
+            "node": {
+                "id": "UmVwb3J0OjE=",
+                "date": "2018-01-01T12:00:00+00:00",
+                "published": "2018-01-02T10:00:00+00:00",
+                "edited": "2018-01-02T10:00:00+00:00",
+                "extra": '{"foo": "bar"}',
+            }
+        }
+    ]
+    report = pythonize_report_edges(edges)[0]["node"]
+    assert report["id"] == "1"
+    assert report["date"].isoformat() == "2018-01-01"
+    assert report["published"] == arrow.get("2018-01-02T10:00:00+00:00").datetime
+    assert report["edited"] == report["published"]
+    assert report["extra"] == {"foo": "bar"}
 
-def test_encode_arguments():
-    arguments = {
-        "first": 7,
-        "after": str_argument("ABC"),
-        "query": str_argument("foo"),
-        "sort": "NAME",
-        "reversed": "true",
+
+def test_lazy_report__decodes_on_first_access():
+    data = {
+        "id": "UmVwb3J0OjE=",
+        "title": "Foo",
+        "published": "2018-01-02T10:00:00+00:00",
+        "extra": None,
+        "author": {"id": "QXV0aG9yOjI=", "firstName": "Jan", "extra": '{"a": 1}'},
     }
-    expected = 'first: 7, after: "ABC", query: "foo", sort: NAME, reversed: true'
-    assert encode_arguments(arguments) == expected
+    report = LazyReport(data)
+    assert data["id"] == "UmVwb3J0OjE="
+    assert report["id"] == "1"
+    assert report["published"] is report["published"]
+    assert report["extra"] is None
+    assert report["author"]["id"] == "2"
+    assert report["author"]["extra"] == {"a": 1}
+    assert "{firstName}".format(**report["author"]) == "Jan"
+    assert "date" not in report
+    with pytest.raises(KeyError):
+        report["date"]
+
+
+def test_lazy_report__set_item():
+    report = LazyReport({"id": "UmVwb3J0OjE=", "title": "Foo"})
+    report["title"] = "Bar"
+    report["author"] = {"id": "1"}
+    assert report["title"] == "Bar"
+    assert "author" in report
+    assert sorted(report) == ["author", "id", "title"]
+    assert len(report) == 3
+
+
+def test_lazy_report__revisions_share_decoder():
+    report = LazyReport(
+        {
+            "id": "UmVwb3J0OjE=",
+            "edited": "2018-01-02T10:00:00+00:00",
+            "revisions": [
+                {"id": "UmVwb3J0OjE=", "edited": "2018-01-02T10:00:00+00:00"}
+            ],
+        }
+    )
+    assert report["revisions"][0]["edited"] is report["edited"]
+    assert not hasattr(report, "__dict__")
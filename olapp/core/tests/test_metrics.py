@@ -0,0 +1,64 @@
+import pytest
+
+from ..metrics import Registry, registry, render_metrics
+from ..views import metrics
+
+
+def test_registry():
+    registry = Registry()
+    registry.observe("duration", 0.5, operation="foo")
+    registry.observe("duration", 0.25, operation="foo")
+    registry.inc("errors", operation="foo")
+    registry.inc("errors", 2, operation="foo")
+    assert registry.collect() == [
+        ("duration_count", (("operation", "foo"),), 2),
+        ("duration_sum", (("operation", "foo"),), 0.75),
+        ("errors", (("operation", "foo"),), 3),
+    ]
+
+
+def test_server_timing(api, client, settings):
+    settings.METRICS = True
+    response = client.get("/report/1/")
+    timing = response["Server-Timing"]
+    assert "api;dur=" in timing
+    assert 'desc="report"' in timing
+    for phase in ["view", "render", "total"]:
+        assert f"{phase};dur=" in timing
+
+
+def test_server_timing__asgi(api, asgi_get, settings):
+    settings.METRICS = True
+    [response] = asgi_get("/report/1/")
+    timing = response.headers["Server-Timing"]
+    assert "api;dur=" in timing
+    for phase in ["view", "render", "total"]:
+        assert f"{phase};dur=" in timing
+
+
+def test_server_timing__disabled(api, client, settings):
+    settings.METRICS = False
+    assert "Server-Timing" not in client.get("/report/1/")
+
+
+def test_metrics(api, client, rf):
+    client.get("/report/1/")
+    client.get("/report/1/")
+
+    response = metrics(rf.get("/metrics"))
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    lines = response.content.decode().splitlines()
+    assert "# TYPE olapp_api_duration_seconds summary" in lines
+    assert 'olapp_api_duration_seconds_count{operation="report"} 1' in lines
+    assert 'olapp_api_cache_hits_total{operation="report"} 1' in lines
+    assert 'olapp_view_responses_total{status="200",view="report"} 2' in lines
+    assert 'olapp_view_duration_seconds_count{phase="render",view="report"} 2' in lines
+    assert 'olapp_cache_entries{cache="query"} 1' in lines
+    assert "olapp_circuit_open 0" in lines
+
+
+def test_metrics__api_errors(api, client):
+    api.respond = lambda payload: (200, {"errors": [{"message": "Boom"}]})
+    with pytest.raises(Exception):
+        client.get("/report/1/")
+    assert 'olapp_api_errors_total{operation="report"} 1' in render_metrics()
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import pytest
+
+from ..graphql import call_api
+from ..queries import SEARCH_REPORTS_QUERY
+
+
+VARIABLES = {"query": "foo", "first": 10, "sort": "RELEVANCE", "withViewer": True}
+
+
+@pytest.fixture
+def server(api_server):
+    """Open Lobby Server stub which supports automatic persisted queries."""
+    documents = {}
+
+    def respond(payload):
+        if "extensions" in payload:
+            hash = payload["extensions"]["persistedQuery"]["sha256Hash"]
+        else:
+            hash = hashlib.sha256(payload["query"].encode()).hexdigest()
+
+        if "query" in payload:
+            assert hashlib.sha256(payload["query"].encode()).hexdigest() == hash
+            documents[hash] = payload["query"]
+
+        if hash in documents:
+            return 200, {"data": {"searchReports": {"totalCount": 0, "edges": []}}}
+
+        return 200, {"errors": [api_server.error]}
+
+    api_server.respond = respond
+    api_server.error = {
+        "message": "PersistedQueryNotFound",
+        "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+    }
+    return api_server
+
+
+def test_persisted_queries(server, settings):
+    settings.OPENLOBBY_API_PERSISTED_QUERIES = True
+
+    for i in range(2):
+        data = call_api(server.url, SEARCH_REPORTS_QUERY, variables=VARIABLES)
+        assert data == {"searchReports": {"totalCount": 0, "edges": []}}
+
+    # first hash is unknown, then document is sent with text just once
+    payloads = [json.loads(content) for content in server.requests]
+    assert ["query" in payload for payload in payloads] == [False, True, False]
+
+    saved = len(server.requests[1]) - len(server.requests[2])
+    assert saved >= len(SEARCH_REPORTS_QUERY.text)
+
+
+def test_persisted_queries__error_code_only(server, settings):
+    settings.OPENLOBBY_API_PERSISTED_QUERIES = True
+    server.error = {
+        "message": "Query not found",
+        "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+    }
+
+    data = call_api(server.url, SEARCH_REPORTS_QUERY, variables=VARIABLES)
+    assert data == {"searchReports": {"totalCount": 0, "edges": []}}
+    payloads = [json.loads(content) for content in server.requests]
+    assert ["query" in payload for payload in payloads] == [False, True]
+
+
+def test_persisted_queries__disabled(server, settings):
+    settings.OPENLOBBY_API_PERSISTED_QUERIES = False
+
+    call_api(server.url, SEARCH_REPORTS_QUERY, variables=VARIABLES)
+
+    payload = json.loads(server.requests[0])
+    assert payload["query"] == SEARCH_REPORTS_QUERY.text
+    assert "extensions" not in payload
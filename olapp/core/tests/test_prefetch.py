@@ -0,0 +1,100 @@
+import json
+import pytest
+import threading
+
+from .. import prefetch
+from ..graphql import encode_cursor
+from ..prefetch import Prefetcher
+from .conftest import REPORT
+
+
+EDGES = [{"cursor": "x", "node": REPORT}] * 10
+# results of index and author pages, three pages each
+RESULTS = {
+    "node": dict(REPORT["author"], reports={"totalCount": 30, "edges": EDGES}),
+    "searchReports": {"totalCount": 30, "edges": EDGES},
+}
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(prefetch.prefetcher, "max_workers", 1)
+
+
+def test_prefetcher__runs_in_background():
+    prefetcher = Prefetcher(1)
+    done = threading.Event()
+    assert prefetcher.submit("a", done.set)
+    assert done.wait(1)
+    prefetcher.shutdown()
+
+
+def test_prefetcher__skips_when_busy():
+    prefetcher = Prefetcher(1)
+    release = threading.Event()
+    assert prefetcher.submit("a", release.wait, 1)
+    assert not prefetcher.submit("b", release.wait, 1)
+    assert prefetcher.skipped == 1
+    release.set()
+    prefetcher.shutdown()
+    assert prefetcher.submit("b", release.wait, 1)
+    prefetcher.shutdown()
+
+
+def test_prefetcher__skips_running_key():
+    prefetcher = Prefetcher(2)
+    release = threading.Event()
+    assert prefetcher.submit("a", release.wait, 1)
+    assert not prefetcher.submit("a", release.wait, 1)
+    release.set()
+    prefetcher.shutdown()
+
+
+def test_prefetcher__disabled():
+    prefetcher = Prefetcher(0)
+    assert not prefetcher.submit("a", print)
+
+
+def test_prefetcher__ignores_errors():
+    prefetcher = Prefetcher(1)
+    assert prefetcher.submit("a", lambda: 1 / 0)
+    prefetcher.shutdown()
+    assert prefetcher.submit("a", print)
+    prefetcher.shutdown()
+
+
+def test_prefetcher__skips_when_worker_is_busy():
+    prefetcher = Prefetcher(1, max_requests=1)
+    prefetcher.start_request()
+    prefetcher.start_request()
+    assert not prefetcher.submit("a", print)
+    prefetcher.end_request()
+    assert prefetcher.submit("a", print)
+    prefetcher.shutdown()
+
+
+@pytest.mark.parametrize("api", [RESULTS], indirect=True)
+@pytest.mark.parametrize(
+    "path, next_path",
+    [("/?q=foo", "/?q=foo&p=2"), ("/author/2/", "/author/2/2/")],
+)
+def test_view__prefetches_next_page(api, enabled, client, path, next_path):
+    assert client.get(path).status_code == 200
+    prefetch.prefetcher.shutdown()
+    assert client.get(next_path).status_code == 200
+    prefetch.prefetcher.shutdown()
+
+    # the second page is in query cache, it prefetches the third one
+    offsets = [json.loads(r)["variables"].get("after") for r in api.requests]
+    assert offsets == [None, encode_cursor(10), encode_cursor(20)]
+
+
+@pytest.mark.parametrize("api", [RESULTS], indirect=True)
+def test_view__no_prefetch_for_busy_worker(api, enabled, client):
+    prefetch.prefetcher.start_request()
+    try:
+        client.get("/?q=foo")
+        prefetch.prefetcher.shutdown()
+    finally:
+        prefetch.prefetcher.end_request()
+    assert len(api.requests) == 1
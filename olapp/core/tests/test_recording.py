@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+
+from ..documents import Document
+from ..graphql import call_api
+from ..recording import Recorder, read_records
+
+
+FOO_QUERY = Document("foo", "query foo($id: ID!) { foo(id: $id) }")
+
+
+def test_recorder(tmp_path):
+    recorder = Recorder(str(tmp_path / "records.{pid}.jsonl.gz"))
+    payload = {"operationName": "foo", "variables": {"id": 1}}
+    response = {"data": {"foo": "bar"}}
+    recorder.record(payload, {}, 200, json.dumps(response).encode())
+    recorder.record(payload, {}, 502, b"{}")
+    recorder.record(payload, {}, 200, b'{"errors": [{"message": "foo"}]}')
+    recorder.close()
+
+    path = tmp_path / f"records.{os.getpid()}.jsonl.gz"
+    assert list(read_records(path)) == [
+        {
+            "operationName": "foo",
+            "variables": {"id": 1},
+            "authorized": False,
+            "response": response,
+        }
+    ]
+
+
+def test_recorder__batch(tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+    recorder = Recorder(str(path))
+    payload = [
+        {"operationName": "foo", "variables": {"id": 1}},
+        {"operationName": "bar", "variables": None},
+    ]
+    response = [{"data": {"foo": 1}}, {"errors": [{"message": "bar"}]}]
+    headers = {"Authorization": "Bearer token"}
+    recorder.record(payload, headers, 200, json.dumps(response).encode())
+    recorder.close()
+
+    records = list(read_records(path))
+    assert [(r["operationName"], r["authorized"]) for r in records] == [("foo", True)]
+
+
+def record_foo(recorder, id):
+    payload = {"operationName": "foo", "variables": {"id": id}}
+    recorder.record(payload, {}, 200, b'{"data": {"foo": "bar"}}')
+
+
+def test_recorder__batches(tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+    recorder = Recorder(str(path), batch_size=2)
+    for id in range(3):
+        record_foo(recorder, id)
+
+    # the last record is buffered
+    assert [r["variables"]["id"] for r in read_records(path)] == [0, 1]
+    recorder.close()
+    assert [r["variables"]["id"] for r in read_records(path)] == [0, 1, 2]
+
+
+def test_read_records__truncated(tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+    recorder = Recorder(str(path), batch_size=1)
+    for id in range(2):
+        record_foo(recorder, id)
+    # process killed while writing next batch
+    with open(path, "ab") as file:
+        file.write(gzip.compress(b'{"operationName": "foo"}\n' * 10)[:20])
+
+    assert [r["variables"]["id"] for r in read_records(path)] == [0, 1]
+
+
+def test_call_api__records(api_server, monkeypatch, tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+    recorder = Recorder(str(path))
+    monkeypatch.setattr("olapp.core.graphql.recorder", recorder)
+    api_server.respond = lambda payload: (200, {"data": {"foo": "bar"}})
+
+    assert call_api(api_server.url, FOO_QUERY, variables={"id": 1}) == {"foo": "bar"}
+    recorder.close()
+
+    [record] = read_records(path)
+    assert record["operationName"] == "foo"
+    assert record["variables"] == {"id": 1}
+    assert record["response"] == {"data": {"foo": "bar"}}
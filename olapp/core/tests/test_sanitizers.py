@@ -1,6 +1,9 @@
+import bleach
 import pytest
+import re
 
-from ..sanitizers import strip_all_tags, extract_text
+from ..forms import ReportForm
+from ..sanitizers import extract_text, strip_all_tags, strip_all_tags_fields
 
 
 @pytest.mark.parametrize(
@@ -30,3 +33,83 @@ def test_strip_all_tags(input, text):
 )
 def test_extract_text(input, text):
     assert extract_text(input) == text
+
+
+# inputs for differential tests against plain bleach
+CORPUS = [
+    "",
+    " ",
+    "foo",
+    "Schůzka s panem ministrem, řešili jsme zákon č. 123/2018 Sb.",
+    "line\nother line\n\n\tindented",
+    "windows\r\nline endings\r",
+    "quotes \" and ' apostrophes",
+    "ampersand & entity &amp; &lt; &#65; &#x41; &nbsp; &unknown;",
+    "less < greater > and 1<2",
+    "has <b>some</b> tags",
+    "<script>alert(1)</script>",
+    "<!-- comment --> text",
+    "<IMG SRC=j&#X41vascript:alert('test2')>",
+    "<a href='x'>unclosed",
+    "x" * 10000 + "<b>",
+    "emoji 😀 and \U0001fffe",
+    "nul\x00 and controls \x01\x08\x0b\x0c\x1f\x7f\x85",
+    "=/*-+.",
+]
+
+# every character of ASCII and Latin-1 in text
+CHARACTERS = [f"a{chr(cp)}b" for cp in range(0x100)]
+
+
+def reference_strip_all_tags(value):
+    return bleach.clean(value, tags=[], strip=True)
+
+
+def reference_extract_text(value):
+    return " ".join(re.findall(r"(\b\w+)", reference_strip_all_tags(value)))
+
+
+@pytest.mark.parametrize("value", CORPUS)
+def test_strip_all_tags__same_as_bleach(value):
+    assert strip_all_tags(value) == reference_strip_all_tags(value)
+
+
+@pytest.mark.parametrize("value", CORPUS)
+def test_extract_text__same_as_bleach(value):
+    assert extract_text(value) == reference_extract_text(value)
+
+
+def test_sanitizers__characters_same_as_bleach():
+    for value in CHARACTERS:
+        assert strip_all_tags(value) == reference_strip_all_tags(value), value
+        assert extract_text(value) == reference_extract_text(value), value
+
+
+def test_strip_all_tags_fields():
+    data = {"a": "<b>x</b>", "b": "y", "c": "", "d": "<i>z</i>"}
+    assert strip_all_tags_fields(data, ["a", "b", "c", "e"]) == {
+        "a": "x",
+        "b": "y",
+        "c": "",
+        "d": "<i>z</i>",
+    }
+
+
+def test_report_form__strips_tags():
+    form = ReportForm(
+        {
+            "title": "<b>Title</b>",
+            "body": "Body & <i>more</i>",
+            "received_benefit": "",
+            "provided_benefit": "none",
+            "date": "2018-01-01",
+            "our_participants": "<script>x</script>",
+            "other_participants": "a<br>b",
+            "publish": "1",
+        }
+    )
+    assert form.is_valid()
+    for field in ReportForm.text_fields:
+        value = form.data[field]
+        assert form.cleaned_data[field] == reference_strip_all_tags(value)
+    assert form.cleaned_data["is_draft"] is False
@@ -0,0 +1,132 @@
+import os
+import pytest
+import threading
+
+from ..cache import ResponseCache, create_cache
+from ..shared_cache import ConnectionPool, SharedCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def test_shared_cache(path):
+    cache = SharedCache(path, "foo", 100)
+    assert cache.get("a") is None
+    cache.set("a", b"abc", 10)
+    assert cache.get("a") == b"abc"
+    cache.set("a", b"abcd", 10)
+    assert cache.get("a") == b"abcd"
+    assert cache.stats() == {
+        "entries": 1,
+        "size": 4,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_shared_cache__shared_by_instances(path):
+    SharedCache(path, "foo", 100).set("a", b"abc", 10)
+    assert SharedCache(path, "foo", 100).get("a") == b"abc"
+    assert SharedCache(path, "bar", 100).get("a") is None
+
+
+def test_shared_cache__shared_by_processes(path):
+    cache = SharedCache(path, "foo", 100)
+    cache.set("a", b"parent", 10)
+    pid = os.fork()
+    if pid == 0:
+        # child has its own connection
+        ok = cache.get("a") == b"parent"
+        cache.set("b", b"child", 10)
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert status == 0
+    assert cache.get("b") == b"child"
+
+
+def test_shared_cache__reuses_connections(path, monkeypatch):
+    connections = []
+    connect = ConnectionPool.connect
+
+    def counting_connect(self):
+        connections.append(connect(self))
+        return connections[-1]
+
+    monkeypatch.setattr(ConnectionPool, "connect", counting_connect)
+    cache = SharedCache(path, "foo", 100)
+    other = SharedCache(path, "bar", 100)
+    cache.set("a", b"abc", 10)
+
+    # short-lived threads (or greenlets) don't open connections of their own
+    for i in range(10):
+        thread = threading.Thread(target=lambda: other.set("a", cache.get("a"), 10))
+        thread.start()
+        thread.join()
+
+    assert other.get("a") == b"abc"
+    assert len(connections) == 1
+    cache.close()
+
+
+def test_shared_cache__expires(path, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("olapp.core.shared_cache.time.time", lambda: now)
+    cache = SharedCache(path, "foo", 100)
+    cache.set("a", b"abc", 10)
+    now += 11
+    assert cache.get("a") is None
+
+
+def test_shared_cache__evicts_entries_expiring_soonest(path):
+    cache = SharedCache(path, "foo", 6)
+    cache.set("a", b"abc", 10)
+    cache.set("b", b"abc", 20)
+    cache.set("c", b"abc", 30)
+    assert cache.get("a") is None
+    assert cache.get("b") == b"abc"
+    assert cache.get("c") == b"abc"
+    assert cache.stats()["size"] == 6
+    assert cache.evictions == 1
+
+
+def test_shared_cache__skips_too_large_value(path):
+    cache = SharedCache(path, "foo", 2)
+    cache.set("a", b"abc", 10)
+    assert cache.get("a") is None
+
+
+def test_shared_cache__delete(path):
+    cache = SharedCache(path, "foo", 100)
+    other = SharedCache(path, "bar", 100)
+    for key in ["report:1:a", "report:1:b", "report:10:a"]:
+        cache.set(key, b"x", 10)
+        other.set(key, b"x", 10)
+
+    cache.delete("report:1:a")
+    assert cache.get("report:1:a") is None
+    cache.delete_prefix("report:1:")
+    assert cache.get("report:1:b") is None
+    assert cache.get("report:10:a") == b"x"
+    cache.clear()
+    assert len(cache) == 0
+    assert len(other) == 3
+
+
+def test_shared_cache__database_error(tmp_path):
+    cache = SharedCache(str(tmp_path / "missing" / "cache.sqlite3"), "foo", 100)
+    cache.set("a", b"abc", 10)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_create_cache(settings, path):
+    settings.SHARED_CACHE_PATH = path
+    assert isinstance(create_cache("foo", 100), SharedCache)
+    settings.APP_VERSION = "abc"
+    assert create_cache("foo", 100).path == path.replace(".sqlite3", ".abc.sqlite3")
+    assert isinstance(create_cache("foo", 0), ResponseCache)
+    settings.SHARED_CACHE_PATH = None
+    assert isinstance(create_cache("foo", 100), ResponseCache)
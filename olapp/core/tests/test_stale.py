@@ -0,0 +1,50 @@
+from ..cache import response_cache
+from ..stale import STALE_WARNING, refresher, stale_cache
+from .conftest import REPORT
+
+
+def unavailable(payload):
+    return 503, {}
+
+
+def test_stale_if_error(api, client):
+    fresh = client.get("/report/1/")
+    assert fresh.status_code == 200
+    assert len(stale_cache) == 1
+
+    response_cache.clear()
+    api.respond = unavailable
+    response = client.get("/report/1/")
+    assert response.status_code == 200
+    assert response["Warning"] == STALE_WARNING
+    assert "no-store" in response["Cache-Control"]
+    assert response.content == fresh.content
+
+
+def test_stale_if_error__refresh(api, client):
+    client.get("/report/1/")
+    response_cache.clear()
+
+    # server fails for the request and recovers for refresh in background
+    changed = dict(REPORT, title="Changed title", edited="2018-02-01T10:00:00+00:00")
+    responses = [(503, {}), (200, {"data": {"node": changed}})]
+    api.respond = lambda payload: responses.pop(0)
+
+    response = client.get("/report/1/")
+    assert response["Warning"] == STALE_WARNING
+    assert b"Changed title" not in response.content
+    refresher.shutdown()
+    assert b"Changed title" in stale_cache.get("/report/1/")
+
+
+def test_stale_if_error__not_for_viewer(api, client, settings):
+    client.get("/report/1/")
+    api.respond = unavailable
+    response_cache.clear()
+    client.cookies[settings.ACCESS_TOKEN_COOKIE] = "token"
+    assert client.get("/report/1/").status_code == 503
+
+
+def test_stale_if_error__no_stale_response(api, client):
+    api.respond = unavailable
+    assert client.get("/report/1/").status_code == 503
@@ -0,0 +1,49 @@
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client
+import pytest
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    # tiny files aren't compressed, add one which is worth it
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "big.css").write_text("p { color: red; }\n" * 100)
+
+    settings.STATICFILES_DIRS = [str(source)]
+    settings.STATIC_ROOT = str(tmp_path / "static")
+    settings.STATICFILES_STORAGE = (
+        "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    )
+    call_command("collectstatic", interactive=False, verbosity=0)
+
+
+def test_static__hashed_names(collected):
+    assert static("big.css").startswith("/static/big.")
+    assert static("big.css") != "/static/big.css"
+
+
+def test_static__compressed(collected):
+    url = static("big.css")
+
+    # new client loads middleware which scans collected files
+    response = Client().get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+    assert response.status_code == 200
+    assert response["Content-Encoding"] == "br"
+    assert response["Cache-Control"] == "max-age=315360000, public, immutable"
+
+    response = Client().get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Vary"] == "Accept-Encoding"
+
+    response = Client().get(url)
+    assert "Content-Encoding" not in response
+
+
+def test_static__asgi(collected, asgi_get):
+    url = static("big.css")
+    [response] = asgi_get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == "p { color: red; }\n" * 100
@@ -0,0 +1,46 @@
+"""Shared per-process state under threaded workers (gunicorn gthread)."""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.test import Client
+import threading
+
+from ..client import close_session, get_session
+from ..metrics import registry
+
+THREADS = 16
+
+
+def run_in_threads(func, count):
+    barrier = threading.Barrier(THREADS)
+
+    def run(i):
+        barrier.wait()
+        return [func() for _ in range(count)]
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        results = list(executor.map(run, range(THREADS)))
+    return [result for results_of_thread in results for result in results_of_thread]
+
+
+def test_get_session__shared_by_threads():
+    close_session()
+    sessions = run_in_threads(get_session, 1)
+    assert len({id(session) for session in sessions}) == 1
+    close_session()
+
+
+def test_concurrent_requests(api):
+    # client keeps cookies, it can't be shared by threads
+    local = threading.local()
+
+    def get():
+        if not hasattr(local, "client"):
+            local.client = Client()
+        return local.client.get("/report/1/").status_code
+
+    statuses = run_in_threads(get, 10)
+    assert statuses == [200] * THREADS * 10
+
+    samples = {(name, labels): value for name, labels, value in registry.collect()}
+    key = ("olapp_view_responses_total", (("status", 200), ("view", "report")))
+    assert samples[key] == THREADS * 10
@@ -0,0 +1,87 @@
+from django.test import AsyncClient
+from urllib.parse import urlencode
+import asyncio
+import jwt
+import time
+
+from ..tokens import get_claims, get_expiration, is_doomed
+
+
+def make_token(**payload):
+    return jwt.encode(payload, "secret").decode("utf-8")
+
+
+def test_get_claims():
+    token = make_token(sub="foo", exp=2000000000)
+    assert get_claims(token) == {"sub": "foo", "exp": 2000000000}
+    assert get_claims(token) is get_claims(token)
+
+
+def test_get_claims__malformed():
+    assert get_claims("foo") is None
+
+
+def test_get_expiration():
+    assert get_expiration(make_token(exp=2000000000)) == 2000000000
+    assert get_expiration(make_token(sub="foo")) is None
+    assert get_expiration(make_token(exp="tomorrow")) is None
+
+
+def test_is_doomed():
+    assert not is_doomed(make_token(exp=int(time.time()) + 60))
+    assert not is_doomed(make_token(sub="foo"))
+    assert is_doomed(make_token(exp=int(time.time()) - 60))
+    assert is_doomed("foo")
+
+
+def test_view__expired_token_is_dropped(api, client, settings):
+    token = make_token(exp=int(time.time()) - 60)
+    client.cookies[settings.ACCESS_TOKEN_COOKIE] = token
+
+    response = client.get("/report/1/")
+    assert response.status_code == 200
+    assert "Authorization" not in api.headers[0]
+    cookie = response.cookies[settings.ACCESS_TOKEN_COOKIE]
+    assert cookie.value == ""
+    assert cookie["max-age"] == 0
+
+
+def test_view__valid_token_is_sent(api, client, settings):
+    token = make_token(exp=int(time.time()) + 60)
+    client.cookies[settings.ACCESS_TOKEN_COOKIE] = token
+
+    response = client.get("/report/1/")
+    assert response.status_code == 200
+    assert api.headers[0]["Authorization"] == f"Bearer {token}"
+    assert settings.ACCESS_TOKEN_COOKIE not in response.cookies
+
+
+REPORT_FORM = {"title": "Title", "body": "Body", "date": "2018-01-01"}
+
+
+def test_view__expired_token_in_mutation(api, client, settings):
+    client.cookies[settings.ACCESS_TOKEN_COOKIE] = make_token(exp=int(time.time()) - 60)
+
+    response = client.post("/new-report/", REPORT_FORM)
+    assert response.status_code == 302
+    assert response["Location"] == "/login/"
+    assert api.requests == []
+    assert response.cookies[settings.ACCESS_TOKEN_COOKIE].value == ""
+
+
+def test_async_view__expired_token_in_mutation(api, async_views, settings):
+    client = AsyncClient()
+    client.cookies[settings.ACCESS_TOKEN_COOKIE] = make_token(exp=int(time.time()) - 60)
+
+    # multipart body of AsyncClient in Django 3.2 can't be read
+    response = asyncio.run(
+        client.post(
+            "/report/1/edit/",
+            urlencode(REPORT_FORM),
+            content_type="application/x-www-form-urlencoded",
+        )
+    )
+    assert response.status_code == 302
+    assert response["Location"] == "/login/"
+    assert api.requests == []
+    assert response.cookies[settings.ACCESS_TOKEN_COOKIE].value == ""
@@ -0,0 +1,55 @@
+from ..utils import Paginator, get_build_hash
+
+
+def nums(paginator):
+    return [page and page["num"] for page in paginator.pages]
+
+
+def test_paginator__few_pages():
+    paginator = Paginator(2, 3, "/?p={num}")
+    assert paginator.show
+    assert paginator.pages == [
+        {"num": 1, "url": "/?p=1", "active": False},
+        {"num": 2, "url": "/?p=2", "active": True},
+        {"num": 3, "url": "/?p=3", "active": False},
+    ]
+    assert paginator.previous_url == "/?p=1"
+    assert paginator.next_url == "/?p=3"
+
+
+def test_paginator__window():
+    paginator = Paginator(5000, 10000, "/?p={num}")
+    assert nums(paginator) == [1, None, *range(4995, 5006), None, 10000]
+
+
+def test_paginator__window_at_start():
+    paginator = Paginator(1, 10000, "/?p={num}")
+    assert nums(paginator) == [1, 2, 3, 4, 5, 6, None, 10000]
+    assert paginator.previous_url is None
+    assert paginator.next_url == "/?p=2"
+
+
+def test_paginator__first_url():
+    paginator = Paginator(2, 2, "/author/x/{num}/", first_url="/author/x/")
+    assert paginator.previous_url == "/author/x/"
+    assert paginator.next_url is None
+
+
+def test_paginator__no_pages():
+    paginator = Paginator(1, 0, "/?p={num}")
+    assert not paginator.show
+    assert paginator.pages == []
+    assert paginator.next_url is None
+
+
+def test_get_build_hash__changes_with_static_manifest(settings, tmp_path):
+    settings.STATIC_ROOT = str(tmp_path)
+    manifest = tmp_path / "staticfiles.json"
+    manifest.write_text('{"paths": {"a.css": "a.111.css"}}')
+    get_build_hash.cache_clear()
+    first = get_build_hash()
+
+    manifest.write_text('{"paths": {"a.css": "a.222.css"}}')
+    get_build_hash.cache_clear()
+    assert get_build_hash() != first
+    get_build_hash.cache_clear()
@@ -0,0 +1,59 @@
+from ..cache import response_cache
+from .conftest import REPORT
+
+
+def test_report_view__validators(api, client):
+    response = client.get("/report/1/")
+    assert response.status_code == 200
+    assert response["ETag"]
+    assert "Last-Modified" not in response
+    assert "no-cache" in response["Cache-Control"]
+
+
+def test_report_view__if_none_match(api, client):
+    etag = client.get("/report/1/")["ETag"]
+    response = client.get("/report/1/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert response.content == b""
+
+
+def test_report_view__if_modified_since_is_ignored(api, client):
+    # report isn't edited when its author is renamed
+    response = client.get(
+        "/report/1/", HTTP_IF_MODIFIED_SINCE="Wed, 03 Jan 2018 10:00:00 GMT"
+    )
+    assert response.status_code == 200
+
+
+def test_report_view__etag_changes_with_author(api, client):
+    etag = client.get("/report/1/")["ETag"]
+    renamed = dict(REPORT, author=dict(REPORT["author"], lastName="Dvořák"))
+    api.respond = lambda payload: (200, {"data": {"node": renamed}})
+    response_cache.clear()
+    response = client.get("/report/1/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_author_view__if_none_match(api, client):
+    author = dict(
+        REPORT["author"], reports={"totalCount": 1, "edges": [{"node": REPORT}]}
+    )
+    api.respond = lambda payload: (200, {"data": {"node": author}})
+    response = client.get("/author/2/")
+    assert response.status_code == 200
+    assert "Last-Modified" not in response
+
+    response = client.get("/author/2/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+
+def test_report_view__etag_changes_with_app_version(api, client, settings):
+    settings.APP_VERSION = "1"
+    etag = client.get("/report/1/")["ETag"]
+
+    settings.APP_VERSION = "2"
+    response = client.get("/report/1/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
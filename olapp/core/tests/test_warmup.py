@@ -0,0 +1,23 @@
+from ..warmup import compile_templates, get_template_names, request_pages
+
+
+def test_get_template_names():
+    names = get_template_names()
+    assert "core/index.html" in names
+    assert "503.html" in names
+
+
+def test_compile_templates():
+    assert compile_templates() == len(get_template_names())
+
+
+def test_request_pages(api_server, settings):
+    settings.OPENLOBBY_API_URL = api_server.url
+    api_server.respond = lambda payload: (200, {"data": {"viewer": None}})
+    assert request_pages(["/about/"]) == 1
+
+
+def test_request_pages__server_unavailable(api_server, settings):
+    settings.OPENLOBBY_API_URL = api_server.url
+    api_server.respond = lambda payload: (502, {})
+    assert request_pages(["/about/", "/authors/"]) == 0
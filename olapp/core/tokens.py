@@ -0,0 +1,39 @@
+"""Claims of access tokens issued by Open Lobby Server. Application can't
+verify signature of token (only server can), but it reads claims to know when
+token expires, so expired token isn't sent to server at all.
+"""
+
+import functools
+import jwt
+import time
+
+
+@functools.lru_cache(maxsize=1024)
+def get_claims(token):
+    """Returns claims of token (decoded once per token) or None if token is
+    malformed. Don't modify returned dict, it's shared.
+    """
+    try:
+        claims = jwt.decode(token, verify=False)
+    except jwt.InvalidTokenError:
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def get_expiration(token):
+    """Returns expiration timestamp of token, None if it has no (valid) one."""
+    claims = get_claims(token)
+    if claims is None:
+        return None
+    try:
+        return float(claims["exp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def is_doomed(token):
+    """Checks if server would refuse token, it's malformed or expired."""
+    if get_claims(token) is None:
+        return True
+    expiration = get_expiration(token)
+    return expiration is not None and expiration <= time.time()
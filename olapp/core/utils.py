@@ -1,80 +1,175 @@
-from functools import wraps
+from functools import lru_cache, wraps
 from django.conf import settings
+from django.template import engines
+from django.utils.functional import cached_property
+import asyncio
+import hashlib
+import json
+import os
 import urllib.parse
 
+from .tokens import is_doomed
+
 
 class UnauthorizedError(Exception):
     pass
 
 
+def get_request_token(request):
+    """Returns access token from cookie. Expired (or malformed) token is
+    dropped, server would refuse it anyway, and request is marked to delete
+    the cookie.
+    """
+    token = request.COOKIES.get(settings.ACCESS_TOKEN_COOKIE)
+    if token is not None and is_doomed(token):
+        request.delete_access_token = True
+        return None
+    return token
+
+
+def get_required_token(request):
+    """Returns access token from cookie or raises UnauthorizedError if there
+    is no valid one.
+    """
+    token = get_request_token(request)
+    if token is None:
+        raise UnauthorizedError()
+    return token
+
+
 def get_token(func):
     """View method decorator which gets token from cookie and passes it in
-    method kwargs.
+    method kwargs. Works for asynchronous methods too.
     """
 
+    if asyncio.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_inner_func(self, *args, **kwargs):
+            kwargs["token"] = get_request_token(self.request)
+            return await func(self, *args, **kwargs)
+
+        return async_inner_func
+
     @wraps(func)
     def inner_func(self, *args, **kwargs):
-        kwargs["token"] = self.request.COOKIES.get(settings.ACCESS_TOKEN_COOKIE)
+        kwargs["token"] = get_request_token(self.request)
         return func(self, *args, **kwargs)
 
     return inner_func
 
 
-def viewer_required(func):
-    """View method decorator which raises UnauthorizedError if logged in viewer
-    is not in context data.
+def token_required(func):
+    """View method decorator which gets token from cookie and passes it in
+    method kwargs like get_token, but raises UnauthorizedError if there is no
+    (valid) token. It's for mutations, server would refuse them anyway.
+    Works for asynchronous methods too.
     """
 
+    if asyncio.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_inner_func(self, *args, **kwargs):
+            kwargs["token"] = get_required_token(self.request)
+            return await func(self, *args, **kwargs)
+
+        return async_inner_func
+
     @wraps(func)
     def inner_func(self, *args, **kwargs):
-        context = func(self, *args, **kwargs)
-        if context.get("viewer") is None:
-            raise UnauthorizedError()
-        return context
+        kwargs["token"] = get_required_token(self.request)
+        return func(self, *args, **kwargs)
 
     return inner_func
 
 
-def shorten_pages(page, pages, total_pages):
-    if total_pages <= 20:
-        return pages
+def viewer_required(func):
+    """View method decorator which raises UnauthorizedError if logged in viewer
+    is not in context data. Works for asynchronous methods too.
+    """
+
+    if asyncio.iscoroutinefunction(func):
 
-    items = [1, total_pages]
-    for offset in [-5, -4, -3, -2, -1, 0, 1, 2, 3, 4, 5]:
-        i = page + offset
-        if i not in items and 0 < i <= total_pages:
-            items.append(i)
+        @wraps(func)
+        async def async_inner_func(self, *args, **kwargs):
+            context = await func(self, *args, **kwargs)
+            if context.get("viewer") is None:
+                raise UnauthorizedError()
+            return context
 
-    out = []
-    last = 0
-    for i in sorted(items):
-        if i - last > 1:
-            out.append(None)
-        out.append(pages[i - 1])
-        last = i
+        return async_inner_func
 
-    return out
+    @wraps(func)
+    def inner_func(self, *args, **kwargs):
+        context = func(self, *args, **kwargs)
+        if context.get("viewer") is None:
+            raise UnauthorizedError()
+        return context
 
+    return inner_func
 
-def get_page_info(page, pages, total_pages):
-    if page == 1:
-        previous_url = None
-    else:
-        previous_url = pages[page - 2]["url"]
 
-    if page == total_pages or total_pages == 0:
-        next_url = None
-    else:
-        next_url = pages[page]["url"]
+class Paginator:
+    """Page info for pagination snippet. URLs are built from template with
+    "{num}" placeholder (and optional special URL of the first page) just for
+    pages in visible window, so it's cheap even for thousands of pages.
+    """
 
-    return {
-        "show": len(pages) > 1,
-        "page": page,
-        "pages": shorten_pages(page, pages, total_pages),
-        "total_pages": total_pages,
-        "previous_url": previous_url,
-        "next_url": next_url,
-    }
+    # show all pages up to this count, otherwise first, last and window
+    # around current page
+    max_pages = 20
+    window = 5
+
+    def __init__(self, page, total_pages, url_template, *, first_url=None):
+        self.page = page
+        self.total_pages = total_pages
+        self.url_template = url_template
+        self.first_url = first_url
+
+    @property
+    def show(self):
+        return self.total_pages > 1
+
+    def get_url(self, num):
+        if num == 1 and self.first_url is not None:
+            return self.first_url
+        return self.url_template.replace("{num}", str(num))
+
+    def get_page(self, num):
+        return {"num": num, "url": self.get_url(num), "active": num == self.page}
+
+    @property
+    def previous_url(self):
+        if self.page <= 1:
+            return None
+        return self.get_url(self.page - 1)
+
+    @property
+    def next_url(self):
+        if self.page >= self.total_pages:
+            return None
+        return self.get_url(self.page + 1)
+
+    def get_visible_nums(self):
+        if self.total_pages <= self.max_pages:
+            return range(1, self.total_pages + 1)
+        start = max(self.page - self.window, 1)
+        end = min(self.page + self.window, self.total_pages)
+        nums = {1, self.total_pages}
+        nums.update(range(start, end + 1))
+        return sorted(nums)
+
+    @cached_property
+    def pages(self):
+        """Pages in visible window, gaps between them are None."""
+        out = []
+        last = 0
+        for num in self.get_visible_nums():
+            if num - last > 1:
+                out.append(None)
+            out.append(self.get_page(num))
+            last = num
+        return out
 
 
 def get_sort_option(title, url, option, active, **qs_params):
@@ -82,3 +177,46 @@ def get_sort_option(title, url, option, active, **qs_params):
     qs_params["s"] = option.value
     qs = urllib.parse.urlencode(qs_params)
     return {"title": title, "url": f"{url}?{qs}", "active": option == active}
+
+
+@lru_cache(maxsize=None)
+def get_build_hash():
+    """Returns hash of templates and manifest of collected static files, it
+    changes with every deploy which changes markup or links to static files.
+    """
+    # names relative to their directories, hash is the same on every host
+    files = []
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, dirs, names in os.walk(directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    files.append((os.path.relpath(path, directory), path))
+    files.sort()
+    files.append(
+        ("staticfiles.json", os.path.join(settings.STATIC_ROOT, "staticfiles.json"))
+    )
+
+    digest = hashlib.sha256()
+    for name, path in files:
+        if os.path.isfile(path):
+            digest.update(name.encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def get_app_version():
+    """Returns version of deployed application, APP_VERSION setting or hash of
+    its build.
+    """
+    return settings.APP_VERSION or get_build_hash()
+
+
+def make_etag(*parts):
+    """Returns quoted strong ETag of JSON serializable parts and version of
+    application, page rendered by new deploy differs even for the same data.
+    """
+    parts = (get_app_version(),) + parts
+    data = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return '"{}"'.format(hashlib.sha256(data.encode("utf-8")).hexdigest()[:32])
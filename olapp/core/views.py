@@ -1,6 +1,11 @@
 from django.conf import settings
 from django.core.exceptions import SuspiciousOperation
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.views import View
@@ -14,55 +19,142 @@ import urllib.parse
 from . import queries
 from . import graphql
 from . import mutations
+from .cache import delete_cached_viewer
 from .forms import SearchForm, LoginForm, ReportForm
-from .utils import get_page_info, get_token, viewer_required, get_sort_option
+from .metrics import render_metrics
+from .prefetch import prefetcher
+from .utils import (
+    Paginator,
+    get_sort_option,
+    get_token,
+    make_etag,
+    token_required,
+    viewer_required,
+)
 
 
 AUTHORS_PER_PAGE = 50
 REPORTS_PER_PAGE = 10
 
+AUTHOR_FIELDS = ("id", "firstName", "lastName", "hasCollidingName", "extra")
+VIEWER_FIELDS = AUTHOR_FIELDS + ("email", "openidUid", "isAuthor")
 
-class IndexView(TemplateView):
+
+def get_fields(node, fields):
+    if node is None:
+        return None
+    return [node[field] for field in fields if field in node]
+
+
+class ConditionalGetMixin:
+    """Answers conditional GET with 304 before template is rendered. Views
+    compute ETag from context data in get_etag. There is no Last-Modified,
+    pages show data (e.g. author's name) which isn't versioned by time of edit.
+    """
+
+    def get_etag(self, context):
+        return None
+
+    def render_to_response(self, context, **response_kwargs):
+        etag = self.get_etag(context)
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None:
+            response = super().render_to_response(context, **response_kwargs)
+
+        if etag is not None:
+            response["ETag"] = etag
+        # page differs for logged in viewer, always revalidate it
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ["Cookie"])
+        return response
+
+
+class PrefetchNextPageMixin:
+    """Prefetches next page of results for anonymous visitors into response
+    cache after the current page is rendered. They are likely to page forward.
+    Views set current page attribute and define fetch_page(page) which calls
+    the same query as the view does for the page.
+    """
+
+    next_page_url = None
+
+    def prefetch_next_page(self, page_info, viewer):
+        # only anonymous responses are cached
+        if viewer is None:
+            self.next_page_url = page_info.next_url
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        if self.next_page_url is not None:
+            response.add_post_render_callback(self.submit_prefetch)
+        return response
+
+    def submit_prefetch(self, response):
+        prefetcher.submit(self.next_page_url, self.fetch_page, self.page + 1)
+
+
+class IndexView(PrefetchNextPageMixin, TemplateView):
     template_name = "core/index.html"
+    # served stale if Open Lobby Server is unavailable
+    stale_if_error = True
 
     @get_token
     def get_context_data(self, token, **kwargs):
         context = super().get_context_data(**kwargs)
-        query = ""
+        params = self.get_params()
+        search, viewer = queries.search_reports(
+            settings.OPENLOBBY_API_URL, params, token=token
+        )
+        return self.extend_context(context, search, viewer)
+
+    def get_params(self):
+        self.query = ""
 
         form = SearchForm(self.request.GET)
         if form.is_valid():
-            query = form.cleaned_data["q"]
+            self.query = form.cleaned_data["q"]
             # replace form with new one with cleaned input
-            form = SearchForm({"q": query})
+            form = SearchForm({"q": self.query})
 
-        context["form"] = form
+        self.form = form
 
         try:
-            page = int(self.request.GET.get("p", 1))
+            self.page = int(self.request.GET.get("p", 1))
         except ValueError:
             raise SuspiciousOperation
 
         try:
             default_sort = (
                 queries.ReportsSort.RELEVANCE
-                if query
+                if self.query
                 else queries.ReportsSort.PUBLISHED
             )
-            sort = queries.ReportsSort(self.request.GET.get("s", default_sort))
+            self.sort = queries.ReportsSort(self.request.GET.get("s", default_sort))
         except ValueError:
             raise SuspiciousOperation
 
-        params = {"query": query, "sort": sort, "first": REPORTS_PER_PAGE}
+        return self.get_query_params(self.page)
+
+    def get_query_params(self, page):
+        params = {"query": self.query, "sort": self.sort, "first": REPORTS_PER_PAGE}
 
         if page > 1:
             params["after"] = graphql.encode_cursor((page - 1) * REPORTS_PER_PAGE)
 
-        search, viewer = queries.search_reports(
-            settings.OPENLOBBY_API_URL, params, token=token
-        )
+        return params
 
+    def fetch_page(self, page):
+        queries.search_reports(settings.OPENLOBBY_API_URL, self.get_query_params(page))
+
+    def extend_context(self, context, search, viewer):
+        query = self.query
+        page = self.page
+        sort = self.sort
+
+        context["form"] = self.form
         context["viewer"] = viewer
+        # search results are highlighted by query
+        context["highlight"] = query
         context["reports"] = [edge["node"] for edge in search["edges"]]
         context["total_reports"] = search["totalCount"]
 
@@ -72,13 +164,9 @@ class IndexView(TemplateView):
             raise Http404
 
         url = reverse("index")
-        pages = []
-        for num in range(1, total_pages + 1):
-            url_qs = urllib.parse.urlencode({"q": query, "p": num, "s": sort.value})
-            page_url = f"{url}?{url_qs}"
-            pages.append({"num": num, "url": page_url, "active": page == num})
-
-        context["page_info"] = get_page_info(page, pages, total_pages)
+        url_qs = urllib.parse.urlencode({"q": query, "s": sort.value})
+        context["page_info"] = Paginator(page, total_pages, f"{url}?{url_qs}&p={{num}}")
+        self.prefetch_next_page(context["page_info"], viewer)
 
         # sort options
         context["sort_options"] = [
@@ -98,31 +186,41 @@ class IndexView(TemplateView):
 
 class AuthorsView(TemplateView):
     template_name = "core/authors.html"
+    # served stale if Open Lobby Server is unavailable
+    stale_if_error = True
 
     @get_token
     def get_context_data(self, token, **kwargs):
         context = super().get_context_data(**kwargs)
+        params = self.get_params()
+        authors, viewer = queries.get_authors(
+            settings.OPENLOBBY_API_URL, params, token=token
+        )
+        return self.extend_context(context, authors, viewer)
 
+    def get_params(self):
         try:
-            page = int(self.request.GET.get("p", 1))
+            self.page = int(self.request.GET.get("p", 1))
         except ValueError:
             raise SuspiciousOperation
 
         try:
-            sort = queries.AuthorsSort(
+            self.sort = queries.AuthorsSort(
                 self.request.GET.get("s", queries.AuthorsSort.LAST_NAME)
             )
         except ValueError:
             raise SuspiciousOperation
 
-        params = {"sort": sort, "first": AUTHORS_PER_PAGE}
+        params = {"sort": self.sort, "first": AUTHORS_PER_PAGE}
 
-        if page > 1:
-            params["after"] = graphql.encode_cursor((page - 1) * AUTHORS_PER_PAGE)
+        if self.page > 1:
+            params["after"] = graphql.encode_cursor((self.page - 1) * AUTHORS_PER_PAGE)
 
-        authors, viewer = queries.get_authors(
-            settings.OPENLOBBY_API_URL, params, token=token
-        )
+        return params
+
+    def extend_context(self, context, authors, viewer):
+        page = self.page
+        sort = self.sort
 
         context["viewer"] = viewer
         context["authors"] = [edge["node"] for edge in authors["edges"]]
@@ -135,13 +233,8 @@ class AuthorsView(TemplateView):
 
         url = reverse("authors")
 
-        # generate page info for paginator
-        pages = []
-        for num in range(1, total_pages + 1):
-            url_qs = urllib.parse.urlencode({"p": num, "s": sort.value})
-            page_url = f"{url}?{url_qs}"
-            pages.append({"num": num, "url": page_url, "active": page == num})
-        context["page_info"] = get_page_info(page, pages, total_pages)
+        url_qs = urllib.parse.urlencode({"s": sort.value})
+        context["page_info"] = Paginator(page, total_pages, f"{url}?{url_qs}&p={{num}}")
 
         # sort options
         context["sort_options"] = [
@@ -157,17 +250,15 @@ class AuthorsView(TemplateView):
         return context
 
 
-class ReportView(TemplateView):
+class ReportView(ConditionalGetMixin, TemplateView):
     template_name = "core/report.html"
+    # served stale if Open Lobby Server is unavailable
+    stale_if_error = True
 
     @get_token
     def get_context_data(self, token, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        saved = self.request.GET.get("saved")
-        if saved is not None:
-            context["saved_message"] = True
-
         try:
             report, viewer = queries.get_report(
                 settings.OPENLOBBY_API_URL, kwargs["id"], token=token
@@ -175,10 +266,27 @@ class ReportView(TemplateView):
         except queries.NotFoundError:
             raise Http404
 
+        return self.extend_context(context, report, viewer)
+
+    def extend_context(self, context, report, viewer):
+        saved = self.request.GET.get("saved")
+        if saved is not None:
+            context["saved_message"] = True
+
         context["report"] = report
         context["viewer"] = viewer
         return context
 
+    def get_etag(self, context):
+        report = context["report"]
+        return make_etag(
+            report["id"],
+            report["edited"],
+            get_fields(report["author"], AUTHOR_FIELDS),
+            get_fields(context["viewer"], VIEWER_FIELDS),
+            context.get("saved_message", False),
+        )
+
 
 class ReportHistoryView(TemplateView):
     template_name = "core/report_history.html"
@@ -202,28 +310,45 @@ class ReportHistoryView(TemplateView):
         return context
 
 
-class AuthorView(TemplateView):
+class AuthorView(ConditionalGetMixin, PrefetchNextPageMixin, TemplateView):
     template_name = "core/author.html"
+    # served stale if Open Lobby Server is unavailable
+    stale_if_error = True
 
     @get_token
     def get_context_data(self, token, **kwargs):
         context = super().get_context_data(**kwargs)
-        id = kwargs["id"]
-
-        page = int(kwargs.get("page", 1))
-        if page > 1:
-            cursor = graphql.encode_cursor((page - 1) * REPORTS_PER_PAGE)
-            params = {"first": REPORTS_PER_PAGE, "after": cursor}
-        else:
-            params = {"first": REPORTS_PER_PAGE}
+        params = self.get_params()
 
         try:
             author, viewer = queries.get_author_with_reports(
-                settings.OPENLOBBY_API_URL, id, params, token=token
+                settings.OPENLOBBY_API_URL, kwargs["id"], params, token=token
             )
         except queries.NotFoundError:
             raise Http404
 
+        return self.extend_context(context, author, viewer)
+
+    def get_params(self):
+        self.page = int(self.kwargs.get("page", 1))
+        return self.get_query_params(self.page)
+
+    def get_query_params(self, page):
+        if page > 1:
+            cursor = graphql.encode_cursor((page - 1) * REPORTS_PER_PAGE)
+            return {"first": REPORTS_PER_PAGE, "after": cursor}
+        else:
+            return {"first": REPORTS_PER_PAGE}
+
+    def fetch_page(self, page):
+        queries.get_author_with_reports(
+            settings.OPENLOBBY_API_URL, self.kwargs["id"], self.get_query_params(page)
+        )
+
+    def extend_context(self, context, author, viewer):
+        id = self.kwargs["id"]
+        page = self.page
+
         context["author"] = author
         context["viewer"] = viewer
         context["reports"] = [edge["node"] for edge in author["reports"]["edges"]]
@@ -231,18 +356,27 @@ class AuthorView(TemplateView):
 
         total_pages = math.ceil(author["reports"]["totalCount"] / REPORTS_PER_PAGE)
 
-        pages = []
-        for num in range(1, total_pages + 1):
-            if num == 1:
-                url = reverse("author", kwargs={"id": id})
-            else:
-                url = reverse("author-page", kwargs={"id": id, "page": num})
-            pages.append({"num": num, "url": url, "active": page == num})
-
-        context["page_info"] = get_page_info(page, pages, total_pages)
+        # pages are subpaths of author URL, see "author-page" URL
+        url = reverse("author", kwargs={"id": id})
+        context["page_info"] = Paginator(
+            page, total_pages, f"{url}{{num}}/", first_url=url
+        )
+        self.prefetch_next_page(context["page_info"], viewer)
 
         return context
 
+    def get_etag(self, context):
+        return make_etag(
+            get_fields(context["author"], AUTHOR_FIELDS),
+            context["total_reports"],
+            [(report["id"], report["edited"]) for report in context["reports"]],
+            get_fields(context["viewer"], VIEWER_FIELDS),
+        )
+
+
+def get_login_redirect_uri():
+    return urllib.parse.urljoin(settings.APP_URL, reverse("login-redirect"))
+
 
 class LoginView(FormView):
     template_name = "core/login.html"
@@ -263,7 +397,7 @@ class LoginView(FormView):
 
     def form_valid(self, form):
         openid_uid = form.cleaned_data["openid_uid"]
-        redirect_uri = urllib.parse.urljoin(settings.APP_URL, reverse("login-redirect"))
+        redirect_uri = get_login_redirect_uri()
         data = mutations.login(settings.OPENLOBBY_API_URL, openid_uid, redirect_uri)
         self.authorization_url = data["authorizationUrl"]
         return super().form_valid(form)
@@ -272,7 +406,7 @@ class LoginView(FormView):
 class LoginByShortcutView(View):
     def get(self, request, **kwargs):
         shortcut_id = graphql.encode_global_id("LoginShortcut", kwargs["shortcut_id"])
-        redirect_uri = urllib.parse.urljoin(settings.APP_URL, reverse("login-redirect"))
+        redirect_uri = get_login_redirect_uri()
         data = mutations.login_by_shortcut(
             settings.OPENLOBBY_API_URL, shortcut_id, redirect_uri
         )
@@ -299,6 +433,7 @@ class LogoutView(View):
         # success = mutations.logout(settings.OPENLOBBY_API_URL, token=token)
         success = True
         if success:
+            delete_cached_viewer(token)
             response = HttpResponseRedirect(reverse("index"))
             response.delete_cookie(settings.ACCESS_TOKEN_COOKIE)
         else:
@@ -328,7 +463,7 @@ class NewReportView(FormView):
             url = reverse("report", kwargs={"id": self.id})
         return f"{url}?saved=true"
 
-    @get_token
+    @token_required
     def form_valid(self, form, token):
         id = mutations.create_report(
             settings.OPENLOBBY_API_URL, form.cleaned_data, token=token
@@ -367,7 +502,7 @@ class EditReportView(FormView):
             url = reverse("report", kwargs={"id": self.id})
         return f"{url}?saved=true"
 
-    @get_token
+    @token_required
     def form_valid(self, form, token):
         id = mutations.update_report(
             settings.OPENLOBBY_API_URL, form.cleaned_data, token=token
@@ -381,7 +516,11 @@ class EditReportView(FormView):
     def get_context_data(self, token, **kwargs):
         id = self.kwargs["id"]
         report, viewer = queries.get_report(settings.OPENLOBBY_API_URL, id, token=token)
+        self.check_report(report, viewer)
+        context = super().get_context_data(**kwargs)
+        return self.extend_context(context)
 
+    def check_report(self, report, viewer):
         if not report["isDraft"]:
             if report["author"]["id"] != viewer["id"]:
                 raise Http404
@@ -389,8 +528,7 @@ class EditReportView(FormView):
         self.report = report
         self.viewer = viewer
 
-        context = super().get_context_data(**kwargs)
-
+    def extend_context(self, context):
         saved = self.request.GET.get("saved")
         if saved is not None:
             context["saved_message"] = True
@@ -422,3 +560,9 @@ class AboutView(TemplateView):
         context = super().get_context_data(**kwargs)
         context["viewer"] = queries.get_viewer(settings.OPENLOBBY_API_URL, token=token)
         return context
+
+
+def metrics(request):
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
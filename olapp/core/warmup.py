@@ -0,0 +1,101 @@
+"""Warm-up of worker before it serves first request. It compiles templates
+into cache of template loader, imports views and requests public pages
+against Open Lobby Server, so first visitors don't pay for cold start.
+
+With preloaded application (gunicorn --preload) it's done once in master
+process and forked workers share its result.
+"""
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader import get_template
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# anonymous public pages requested by warm-up
+WARMUP_PATHS = ["/", "/authors/", "/about/", "/login/"]
+
+
+def get_template_names():
+    """Returns names of all templates of this application."""
+    names = []
+    for directory in engines["django"].template_dirs:
+        directory = str(directory)
+        if not directory.startswith(settings.BASE_DIR):
+            continue
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                if file.endswith(".html"):
+                    path = os.path.join(root, file)
+                    names.append(os.path.relpath(path, directory))
+    return sorted(names)
+
+
+def compile_templates():
+    """Compiles templates, cached template loader keeps them (it's used when
+    DEBUG is off).
+    """
+    names = get_template_names()
+    for name in names:
+        get_template(name)
+    return len(names)
+
+
+def request_pages(paths=WARMUP_PATHS):
+    """Requests pages through whole middleware stack, it imports views,
+    resolves URLs and renders templates. Returns count of successful pages.
+    """
+    from django.test import Client
+
+    client = Client()
+    succeeded = 0
+    for path in paths:
+        try:
+            response = client.get(path)
+        except Exception:
+            logger.warning("Warm-up request of %s failed.", path, exc_info=True)
+            continue
+        if response.status_code == 200:
+            succeeded += 1
+        else:
+            logger.warning(
+                "Warm-up request of %s returned %s.", path, response.status_code
+            )
+    return succeeded
+
+
+def release_resources():
+    """Releases connections and threads, they must not be shared by processes
+    forked after warm-up.
+    """
+    from .cache import response_cache
+    from .client import close_session
+    from .fragments import fragment_cache
+    from .metrics import registry
+    from .prefetch import prefetcher
+    from .recording import recorder
+    from .stale import refresher
+
+    close_session()
+    response_cache.close()
+    fragment_cache.close()
+    prefetcher.shutdown()
+    refresher.shutdown()
+    if recorder is not None:
+        recorder.close()
+    # warm-up requests aren't traffic
+    registry.clear()
+
+
+def warm_up():
+    templates = compile_templates()
+    pages = request_pages()
+    release_resources()
+    logger.info(
+        "Warm-up compiled %s templates and requested %s/%s pages.",
+        templates,
+        pages,
+        len(WARMUP_PATHS),
+    )
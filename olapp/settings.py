@@ -29,7 +29,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "olapp.core.middleware.MetricsMiddleware",
+    "olapp.core.middleware.PrefetchMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "olapp.core.middleware.StaticFilesMiddleware",
+    "olapp.core.middleware.CompressionMiddleware",
     # 'django.contrib.sessions.middleware.SessionMiddleware',
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -58,6 +62,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "olapp.wsgi.application"
 
+# use asynchronous views, it's turned on when running on ASGI server
+ASYNC_VIEWS = "ASYNC_VIEWS" in os.environ
+
+# warm up application (compile templates, request public pages) when it's
+# loaded, before worker serves first request
+WARMUP = "WARMUP" in os.environ
+
 
 DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
 
@@ -91,6 +102,11 @@ FORMAT_MODULE_PATH = ("olapp.formats",)
 # Static files (CSS, JavaScript, Images)
 
 STATIC_URL = "/static/"
+STATIC_ROOT = os.path.join(BASE_DIR, "static")
+
+# collectstatic makes content hashed copies of static files with gzip and
+# brotli variants, WhiteNoise serves them with far-future expiration
+STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 
 LOGGING = {
@@ -110,7 +126,96 @@ LOGGING = {
 openlobby_server_dsn = os.environ.get("OPENLOBBY_SERVER_DSN", "http://localhost:8010")
 OPENLOBBY_API_URL = f"{openlobby_server_dsn}/graphql"
 
+# pool of keep-alive connections to Open Lobby Server (per worker process)
+OPENLOBBY_API_POOL_SIZE = int(os.environ.get("OPENLOBBY_API_POOL_SIZE", 10))
+OPENLOBBY_API_MAX_RETRIES = int(os.environ.get("OPENLOBBY_API_MAX_RETRIES", 0))
+
+# send only hashes of known queries to Open Lobby Server (automatic persisted
+# queries), server is asked with full query only if it doesn't know the hash
+OPENLOBBY_API_PERSISTED_QUERIES = "OPENLOBBY_API_PERSISTED_QUERIES" in os.environ
+
+# timeouts (in seconds) of requests to Open Lobby Server
+OPENLOBBY_API_CONNECT_TIMEOUT = float(
+    os.environ.get("OPENLOBBY_API_CONNECT_TIMEOUT", 3.05)
+)
+OPENLOBBY_API_READ_TIMEOUT = float(os.environ.get("OPENLOBBY_API_READ_TIMEOUT", 10))
+
+# circuit breaker of requests to Open Lobby Server (per worker process), it
+# opens when failure rate of at least MIN_CALLS requests in last WINDOW seconds
+# reaches FAILURE_RATE, requests fail fast for OPEN_TIME seconds and then
+# PROBES successful requests close it again (MIN_CALLS 0 disables it)
+OPENLOBBY_API_CIRCUIT_FAILURE_RATE = float(
+    os.environ.get("OPENLOBBY_API_CIRCUIT_FAILURE_RATE", 0.5)
+)
+OPENLOBBY_API_CIRCUIT_MIN_CALLS = int(
+    os.environ.get("OPENLOBBY_API_CIRCUIT_MIN_CALLS", 10)
+)
+OPENLOBBY_API_CIRCUIT_WINDOW = int(os.environ.get("OPENLOBBY_API_CIRCUIT_WINDOW", 30))
+OPENLOBBY_API_CIRCUIT_OPEN_TIME = int(
+    os.environ.get("OPENLOBBY_API_CIRCUIT_OPEN_TIME", 15)
+)
+OPENLOBBY_API_CIRCUIT_PROBES = int(os.environ.get("OPENLOBBY_API_CIRCUIT_PROBES", 2))
+
+# exports metrics at /metrics (Prometheus text format) and timings of request
+# in Server-Timing header
+METRICS = "METRICS" in os.environ
+
+# file where traffic to Open Lobby Server is recorded (gzipped JSON lines) for
+# load tests, {pid} in path is replaced by worker process id
+OPENLOBBY_API_RECORD = os.environ.get("OPENLOBBY_API_RECORD")
+
+# compression of responses (by brotli or gzip) with min. size in bytes of
+# compressed response and levels of compression (brotli 0-11, gzip 1-9)
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+
+# version of deployed application, part of every ETag (default: hash of
+# templates and manifest of collected static files)
+APP_VERSION = os.environ.get("APP_VERSION")
+
 # this application URL (for OpenID authentication redirect)
 APP_URL = os.environ.get("APP_URL", "http://localhost:8020")
 
 ACCESS_TOKEN_COOKIE = "ol_access_token"
+
+# in-process cache of anonymous read queries, max. size in bytes (0 disables it)
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 32 * 1024 * 1024))
+
+# SQLite database file of query and fragment caches shared by worker processes
+# of host (APP_VERSION is added to its name), otherwise every process has its
+# own caches
+SHARED_CACHE_PATH = os.environ.get("SHARED_CACHE_PATH")
+
+# time to live (in seconds) of cached query responses
+QUERY_CACHE_TTL = {
+    "search_reports": 30,
+    "get_authors": 60,
+    "get_author_with_reports": 30,
+    "get_report": 60,
+}
+
+# in-process cache of rendered report snippets, max. size in bytes (0 disables
+# it), and their time to live in seconds
+FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE", 8 * 1024 * 1024))
+FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", 600))
+
+# in-process store of last known good public pages for anonymous visitors,
+# served when Open Lobby Server is unavailable, max. size in bytes (0 disables
+# it), time to live in seconds and threads refreshing them in background
+STALE_CACHE_SIZE = int(os.environ.get("STALE_CACHE_SIZE", 16 * 1024 * 1024))
+STALE_CACHE_TTL = int(os.environ.get("STALE_CACHE_TTL", 24 * 60 * 60))
+STALE_REFRESH_WORKERS = int(os.environ.get("STALE_REFRESH_WORKERS", 1))
+
+# threads (per worker process) prefetching next page of results into query
+# cache for anonymous visitors (0 disables it)
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", 0))
+# prefetch is skipped when worker process serves more requests at once
+PREFETCH_MAX_REQUESTS = int(os.environ.get("PREFETCH_MAX_REQUESTS", 1))
+
+# in-process cache of logged in viewers, max. size in bytes (0 disables it)
+VIEWER_CACHE_SIZE = int(os.environ.get("VIEWER_CACHE_SIZE", 1024 * 1024))
+
+# time to live (in seconds) of cached viewer, it's never cached after token
+# expiration
+VIEWER_CACHE_TTL = int(os.environ.get("VIEWER_CACHE_TTL", 300))
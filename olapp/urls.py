@@ -1,19 +1,40 @@
+from django.conf import settings
 from django.conf.urls import url
-from olapp.core.views import (
-    AboutView,
-    AccountView,
-    AuthorView,
-    AuthorsView,
-    EditReportView,
-    NewReportView,
-    IndexView,
-    LoginView,
-    LoginByShortcutView,
-    LoginRedirectView,
-    LogoutView,
-    ReportView,
-    ReportHistoryView,
-)
+
+from olapp.core.views import metrics
+
+if settings.ASYNC_VIEWS:
+    from olapp.core.async_views import (
+        AboutView,
+        AccountView,
+        AuthorView,
+        AuthorsView,
+        EditReportView,
+        NewReportView,
+        IndexView,
+        LoginView,
+        LoginByShortcutView,
+        LoginRedirectView,
+        LogoutView,
+        ReportView,
+        ReportHistoryView,
+    )
+else:
+    from olapp.core.views import (
+        AboutView,
+        AccountView,
+        AuthorView,
+        AuthorsView,
+        EditReportView,
+        NewReportView,
+        IndexView,
+        LoginView,
+        LoginByShortcutView,
+        LoginRedirectView,
+        LogoutView,
+        ReportView,
+        ReportHistoryView,
+    )
 
 urlpatterns = [
     url(r"^$", IndexView.as_view(), name="index"),
@@ -47,3 +68,6 @@ urlpatterns = [
         name="author-page",
     ),
 ]
+
+if settings.METRICS:
+    urlpatterns.append(url(r"^metrics$", metrics, name="metrics"))
@@ -18,7 +18,7 @@ setup(
     author_email="jan.bednarik@gmail.com",
     description="Open Lobby App",
     long_description=long_description,
-    packages=find_packages(exclude=["tests"]),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
     # TODO
     # install_requires=[],
     # extras_require={